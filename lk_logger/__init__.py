@@ -1,5 +1,6 @@
 from . import console
 from . import printer
+from .async_logger import async_logger
 from .control import counting
 from .control import delay
 from .control import disable
@@ -8,15 +9,21 @@ from .control import enable
 from .control import input
 from .control import mute
 from .control import reload
+from .control import set_min_verbosity
 from .control import setup
+from .control import setup_async
 from .control import start_ipython
 from .control import timing
 from .control import unload
 from .control import unload as restore_builtin_print
 from .control import update
 from .deflector import deflector
+from .file_sink import add_file_sink
+from .file_sink import file_sink
 from .frame_info import FrameInfo
 from .logger import logger
+from .multiprocess import process_sink
+from .multiprocess import setup_worker
 from .printer import bprint
 from .printer import parallel_printing
 from .progress import spinner
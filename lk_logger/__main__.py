@@ -15,19 +15,35 @@ def serve_screenshots() -> None:
 
 def clear_cache() -> None:
     from .screenshot import _output_dir
+    from .sourcemap import sourcemap
     for f in os.listdir(_output_dir):
         if f != '.gitkeep':
             print(':ri', '[red]remove {}[/]'.format(f))
             os.remove(os.path.join(_output_dir, f))
+    sourcemap.persistent_cache.clear()
+    print(':r', '[red]sourcemap cache cleared[/]')
+
+
+def render(file: str) -> None:
+    """
+    render a file captured by `LoggingConfig.capture_file`.
+    """
+    import lk_logger
+    from .capture import render
+    lk_logger.setup(quiet=True)
+    render(file)
 
 
 if __name__ == '__main__':
     # py -m lk_logger serve-screenshots
     # py -m lk_logger clear-cache
+    # py -m lk_logger render <file>
     cmd = sys.argv[1]
     if cmd == 'serve-screenshots':
         serve_screenshots()
     elif cmd == 'clear-cache':
         clear_cache()
+    elif cmd == 'render':
+        render(sys.argv[2])
     else:
         raise ValueError('invalid command: {}'.format(cmd))
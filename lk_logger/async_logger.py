@@ -0,0 +1,155 @@
+"""
+an asyncio friendly logger.
+
+`logger.log` composes the message in the caller's thread. in an event loop -
+that means rendering on the loop thread, and flush marks (`:f`) even wait -
+for the background queue to drain, which stalls every other task.
+
+`AsyncLogger.log` only freezes the caller frame (see `.frame_info -
+.FrozenFrameInfo`) and puts it to a thread-safe queue, which never blocks. -
+a writer thread renders the records through the normal logger, so -
+sourcemap, varnames and markups work as usual. flush marks are handled by -
+the writer thread, use `await async_logger.aflush()` to wait for the output -
+without blocking the loop.
+
+usage:
+    import asyncio
+    import lk_logger
+    lk_logger.setup_async()
+    
+    async def main():
+        print('hello')
+        await lk_logger.async_logger.aflush()
+    
+    asyncio.run(main())
+
+test case:
+    tests/asyncio_logging.py
+"""
+import atexit
+import typing as t
+from asyncio import Future
+from asyncio import get_running_loop
+from inspect import currentframe
+from queue import SimpleQueue
+from threading import Lock
+from threading import Thread
+from time import perf_counter
+from time import sleep
+from traceback import print_exc
+
+from .deflector import deflector
+from .frame_info import FrameInfo
+from .frame_info import FrozenFrameInfo
+from .frame_info import freeze_frame_info
+from .logger import logger
+from .multiprocess import WorkerPrinter
+from .sourcemap import sourcemap
+
+
+class T:
+    Args = t.Tuple[t.Any, ...]
+    Kwargs = t.Dict[str, t.Any]
+    FrameTuple = t.Tuple[str, int, int, str]
+    #   (filepath, lineno, indentation, funcname), see `FrozenFrameInfo`.
+    Record = t.Tuple[t.Union[FrozenFrameInfo, FrameTuple], Args, Kwargs]
+    QueueItem = t.Union[Record, Future, None]  # None means to stop.
+
+
+class AsyncLogger:
+    yield_interval: float = 5e-4
+    #   the max seconds the writer thread runs before yielding the gil to -
+    #   other threads (the event loop). a smaller value means less loop -
+    #   lag, but slower writing.
+    _lock: Lock
+    _queue: 'SimpleQueue[T.QueueItem]'
+    _thread: t.Optional[Thread]
+    
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._queue = SimpleQueue()
+        self._thread = None  # started on the first call.
+    
+    # noinspection PyProtectedMember
+    def log(self, *args: t.Any, **kwargs) -> None:
+        frame = currentframe().f_back
+        if custom_print := deflector.route(frame)[0]:
+            custom_print(*args, **kwargs)
+            return
+        # the output stream is decided by the writer.
+        kwargs.pop('file', None)
+        if level := WorkerPrinter._get_traceback_level(args):
+            frame_info = freeze_frame_info(frame, level)
+        else:
+            # a plain tuple is not tracked by the garbage collector, which -
+            # matters when a lot of messages are waiting in the queue.
+            code = frame.f_code
+            lineno = frame.f_lineno
+            frame_info = (
+                FrameInfo(frame).filepath,
+                lineno,
+                sourcemap.get_indentation(
+                    code.co_filename, lineno, frame.f_globals
+                ),
+                code.co_name,
+            )
+        if self._thread is None:
+            self._start()
+        self._queue.put((frame_info, args, kwargs))
+    
+    async def aflush(self) -> None:
+        """
+        wait until all messages logged before this call are printed.
+        """
+        if self._thread is None:
+            return
+        future = get_running_loop().create_future()
+        self._queue.put(future)
+        await future
+    
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, daemon=True)
+                self._thread.start()
+                atexit.register(self._stop)
+    
+    def _stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+    
+    # noinspection PyProtectedMember
+    def _run(self) -> None:
+        last_yield = perf_counter()
+        while (item := self._queue.get()) is not None:
+            if isinstance(item, Future):
+                if hasattr(logger, '_wait_drained'):
+                    logger._wait_drained()
+                try:
+                    item.get_loop().call_soon_threadsafe(_set_done, item)
+                except RuntimeError:  # the loop is closed.
+                    pass
+                continue
+            frame_info, args, kwargs = item
+            if isinstance(frame_info, tuple):
+                frame_info = FrozenFrameInfo(*frame_info)
+            try:
+                logger.log(*args, _frame_info=frame_info, **kwargs)
+            except Exception:
+                # keep the writer alive.
+                print_exc()
+            # give the gil back to the loop thread from time to time. -
+            # otherwise the loop may wait for a whole switch interval (5ms by -
+            # default, see `sys.getswitchinterval`). doing this after every -
+            # message would make the writer too slow to keep up.
+            if (now := perf_counter()) - last_yield > self.yield_interval:
+                sleep(0)
+                last_yield = now
+
+
+def _set_done(future: Future) -> None:
+    if not future.done():  # it may be cancelled.
+        future.set_result(None)
+
+
+async_logger = AsyncLogger()
@@ -10,49 +10,102 @@ class T:  # Typehint
     MarkupPos = int
     Markup = str
     
+    # see `..logger.MainThreadLogger._is_throttled`.
     # noinspection PyTypedDict
-    Cache = t.Dict[FrameId, t.TypedDict('CacheValue', {
+    Throttle = t.TypedDict('Throttle', {
+        'key'         : t.Optional[tuple],  # args of the last message.
+        'repeats'     : int,
+        'repeat_start': float,
+        'suppressed'  : int,
+        'window_count': int,
+        'window_start': float,
+    })
+    
+    # noinspection PyTypedDict
+    CacheValue = t.TypedDict('CacheValue', {
         'markup_pos'   : MarkupPos,
         'marks_meaning': T0.MarksMeaning,
         'info'         : t.Dict[Markup, T1.Info],
-    })]
+        'throttle'     : t.Optional[Throttle],
+    })
+    Cache = t.Dict[FrameId, CacheValue]
 
 
 class LoggingCache:
+    """
+    note: it is shared by all threads that print, but doesn't need a lock. -
+    entries are created by `dict.setdefault`, which is atomic, so a racing -
+    thread gets the same entry instead of overwriting it. the values are -
+    deterministic for a call site, so storing one twice is harmless.
+    """
     _cache: T.Cache
     
     def __init__(self) -> None:
-        from collections import defaultdict
-        # noinspection PyTypeChecker
-        self._cache = defaultdict(lambda: {
-            'markup_pos'   : None,
-            'marks_meaning': {},
-            'info'         : {},
-        })
+        self._cache = {}
     
     def clear_cache(self) -> None:
         self._cache.clear()
     
+    def _get_entry(self, frame_id: T.FrameId) -> T.CacheValue:
+        try:
+            return self._cache[frame_id]
+        except KeyError:
+            return self._cache.setdefault(frame_id, {
+                'markup_pos'   : None,
+                'marks_meaning': {},
+                'info'         : {},
+                'throttle'     : None,
+            })
+    
     # -------------------------------------------------------------------------
     
     def get_markup_pos(self, frame_id: T.FrameId) -> t.Optional[T.MarkupPos]:
-        return self._cache[frame_id].get('markup_pos', None)
+        if x := self._cache.get(frame_id):
+            return x['markup_pos']
+        return None
     
     def is_cached(self, frame_id: T.FrameId, markup: T.Markup) -> bool:
         return (
-                frame_id in self._cache and
-                markup in self._cache[frame_id]['info']
+                (x := self._cache.get(frame_id)) is not None and
+                markup in x['info']
         )
     
     def get_cache(self, frame_id: T.FrameId, markup: T.Markup) -> T.Info:
         # suggest checking `self.is_cached` before calling this method.
         return self._cache[frame_id]['info'][markup]
     
+    def get_any_info(self, frame_id: T.FrameId) -> t.Optional[T.Info]:
+        """
+        get the info of any markup, for messages that don't care about -
+        markups (e.g. source only).
+        """
+        if x := self._cache.get(frame_id):
+            return next(iter(tuple(x['info'].values())), None)
+        return None
+    
+    def get_throttle(self, frame_id: T.FrameId) -> T.Throttle:
+        entry = self._get_entry(frame_id)
+        if (x := entry['throttle']) is None:
+            x = entry['throttle'] = {
+                'key'         : None,
+                'repeats'     : 0,
+                'repeat_start': 0.0,
+                'suppressed'  : 0,
+                'window_count': 0,
+                'window_start': 0.0,
+            }
+        return x
+    
+    def iter_throttles(self) -> t.Iterator[t.Tuple[T.FrameId, T.Throttle]]:
+        for frame_id, v in tuple(self._cache.items()):
+            if v['throttle']:
+                yield frame_id, v['throttle']
+    
     # -------------------------------------------------------------------------
     
     def record_markup_pos(self, frame_id: T.FrameId, pos: T.MarkupPos) -> None:
-        self._cache[frame_id]['markup_pos'] = pos
+        self._get_entry(frame_id)['markup_pos'] = pos
     
     def store_info(self, frame_id: T.FrameId, markup: T.Markup,
                    info: T.Info) -> None:
-        self._cache[frame_id]['info'][markup] = info
+        self._get_entry(frame_id)['info'][markup] = info
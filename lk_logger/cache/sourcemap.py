@@ -0,0 +1,129 @@
+"""
+persistent storage for `..sourcemap.SourceMap`.
+
+each source file has its own pickle file in a per-user cache directory (see -
+`_get_cache_dir`), loaded lazily when the file is first printed from. an -
+entry is valid only if the source file's mtime and size are unchanged, and -
+it was produced by the same backend (see `SourceMap.backend`).
+an entry is either complete (the whole file was indexed), or partial (only -
+some lines were indexed, see `SourceMap.indexing`).
+"""
+import os
+import sys
+import typing as t
+
+from .util import get_content_hash
+from .util import pickle_dump
+from .util import pickle_load
+
+_CACHE_VERSION = 1  # bump this when the scanner output changes.
+
+
+def _get_cache_dir() -> str:
+    """
+    the installed package may be read-only or shared by users, so the cache -
+    lives in the user's cache directory. it can be overridden by the -
+    environment variable `LK_LOGGER_CACHE_DIR`.
+    """
+    if x := os.getenv('LK_LOGGER_CACHE_DIR'):
+        return os.path.abspath(x)
+    if os.name == 'nt':
+        base = os.getenv('LOCALAPPDATA') or \
+            os.path.expanduser('~/AppData/Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'lk-logger', 'sourcemap').replace('\\', '/')
+
+
+_CACHE_DIR = _get_cache_dir()
+
+
+class T:
+    FileMap = t.Dict[int, t.Tuple[str, ...]]  # {lineno: varnames, ...}
+    # noinspection PyTypedDict
+    Entry = t.TypedDict('Entry', {
+        'version' : int,
+        'backend' : str,
+        'mtime'   : int,  # ns
+        'size'    : int,
+        'complete': bool,
+        'filemap' : FileMap,
+    })
+
+
+class SourceMapCache:
+    enabled: bool
+    
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+    
+    def load(
+        self, filepath: str, backend: str = 'scanner'
+    ) -> t.Optional[t.Tuple[T.FileMap, bool]]:
+        """
+        returns: (filemap, complete) or None if no valid entry.
+        """
+        if not self.enabled:
+            return None
+        try:
+            entry: T.Entry = pickle_load(self._get_entry_path(filepath))
+            stat = os.stat(filepath)
+        except Exception:  # not exists, broken or incompatible.
+            return None
+        if (
+            entry['version'] == _CACHE_VERSION and
+            entry['backend'] == backend and
+            entry['mtime'] == stat.st_mtime_ns and
+            entry['size'] == stat.st_size
+        ):
+            return entry['filemap'], entry['complete']
+        return None
+    
+    def dump(
+        self,
+        filepath: str,
+        filemap: T.FileMap,
+        complete: bool = True,
+        backend: str = 'scanner',
+    ) -> None:
+        if not self.enabled:
+            return
+        try:
+            stat = os.stat(filepath)
+            os.makedirs(_CACHE_DIR, exist_ok=True)
+            pickle_dump(
+                {
+                    'version' : _CACHE_VERSION,
+                    'backend' : backend,
+                    'mtime'   : stat.st_mtime_ns,
+                    'size'    : stat.st_size,
+                    'complete': complete,
+                    'filemap' : filemap,
+                },
+                self._get_entry_path(filepath),
+            )
+        except Exception:
+            # for example the cache directory is not writable, or the -
+            # filemap cannot be pickled. we just skip caching.
+            pass
+    
+    def discard(self, filepath: str) -> None:
+        try:
+            os.remove(self._get_entry_path(filepath))
+        except OSError:
+            pass
+    
+    def clear(self) -> None:
+        if os.path.isdir(_CACHE_DIR):
+            for f in os.listdir(_CACHE_DIR):
+                if f.endswith('.pkl'):
+                    try:
+                        os.remove(f'{_CACHE_DIR}/{f}')
+                    except OSError:
+                        pass
+    
+    @staticmethod
+    def _get_entry_path(filepath: str) -> str:
+        return f'{_CACHE_DIR}/{get_content_hash(filepath)}.pkl'
@@ -0,0 +1,332 @@
+"""
+capture messages to a compact binary file, and render them later.
+
+in capture mode (see `LoggingConfig.capture_file`), the logger doesn't -
+render anything. it only writes the caller frame (once per call site), the -
+arguments and a timestamp to an append-only file. rendering (sourcemap, -
+varnames, markups, rich styles) happens when a human reads the file:
+    
+    py -m lk_logger render <file>
+
+file layout:
+    header: b'LKLG' + version (1 byte)
+    then a sequence of records, each starts with a kind byte:
+        b'F': a frame. `<iIH` (parent index, lineno, indentation), then -
+            filepath and funcname as strings. frames are indexed by the -
+            order they appear.
+        b'M': a message. `<dII` (timestamp, frame index, args count), then -
+            args, then `<I` (kwargs count) and kwargs as (string, arg) pairs.
+    a string is `<I` (utf-8 length) + utf-8 bytes.
+    an arg is a type tag byte + payload:
+        b's': str. b'r': any other object, stored as `str(obj)`.
+        b'i': int, stored as a decimal string. b'f': float, `<d`.
+        b'T', b'F', b'N': True, False, None, no payload.
+
+notes:
+    - arguments are stringified at capture time, so markups which need -
+      live objects (`:e`, `:l`, `:r` with rich renderables, etc.) and timers -
+      (`:t`, which measure time at render) are not captured, they are -
+      rendered immediately as usual.
+    - the file is flushed on `:f` marks and at exit.
+
+test case:
+    tests/capture_and_render.py
+"""
+import atexit
+import os
+import typing as t
+from struct import Struct
+from struct import error as StructError
+from threading import Lock
+from time import time
+
+from .frame_info import FrameInfo
+from .frame_info import FrozenFrameInfo
+from .frame_info import freeze_frame_info
+from .markup import MarkMeaning
+from .markup import markup_analyzer
+from .multiprocess import WorkerPrinter
+
+
+class T:
+    Args = t.Tuple[t.Any, ...]
+    Kwargs = t.Dict[str, t.Any]
+    Markup = str
+    Record = t.Tuple[float, FrozenFrameInfo, Args, Kwargs]
+    #   (timestamp, frame, args, kwargs)
+
+
+_MAGIC = b'LKLG'
+_VERSION = 2  # 2: args and kwargs counts are `<I`.
+
+_frame_head = Struct('<iIH')
+_message_head = Struct('<dII')
+_float = Struct('<d')
+_uint = Struct('<I')
+
+_live_meanings = frozenset((
+    MarkMeaning.EXPAND_OBJECT,
+    MarkMeaning.RICH_OBJECT,
+    MarkMeaning.RICHABLE_DATA,
+    MarkMeaning.TABULAR_DATA,
+    MarkMeaning.TRACEBACK_EXCEPTION,
+    MarkMeaning.TRACEBACK_EXCEPTION_WITH_LOCALS,
+))
+
+
+class CaptureWriter:
+    _file: t.BinaryIO
+    _frame_count: int
+    _frames: t.Dict[t.Hashable, int]
+    #   frame id -> index, for frames without parents. (frozen frame -
+    #   fields) -> index, for frames with parents.
+    _lock: Lock
+    _markups: t.Dict[T.Markup, t.Tuple[bool, bool]]
+    #   markup -> (capturable, flush). see `_check_markup`.
+    
+    def __init__(self, path: str, buffer_size: int = 64 * 1024) -> None:
+        self.path = os.path.abspath(path)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'wb', buffering=buffer_size)
+        self._file.write(_MAGIC + bytes((_VERSION,)))
+        self._frame_count = 0
+        self._frames = {}
+        self._lock = Lock()
+        self._markups = {}
+        atexit.register(self.close)
+    
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+    
+    # noinspection PyProtectedMember
+    def write(
+        self,
+        frame_info: t.Union[FrameInfo, FrozenFrameInfo],
+        args: T.Args,
+        markup: T.Markup,
+        kwargs: T.Kwargs,
+    ) -> bool:
+        """
+        params:
+            args: all arguments, including the markup.
+            markup: the markup separated from args, or an empty string.
+        returns: False if the message cannot be captured, the caller should -
+            render it as usual.
+        """
+        if (x := self._markups.get(markup)) is None:
+            x = self._markups[markup] = self._check_markup(markup)
+        capturable, flush = x
+        if not capturable:
+            return False
+        
+        level = WorkerPrinter._get_traceback_level(args) if markup else 0
+        out = bytearray()
+        with self._lock:
+            if self._file.closed:
+                return False
+            if isinstance(frame_info, FrozenFrameInfo):
+                # e.g. from `.multiprocess.ProcessSink`.
+                index = self._add_frozen_frame(out, frame_info)
+            elif level:
+                index = self._add_frozen_frame(
+                    out, freeze_frame_info(frame_info._frame, level)
+                )
+            elif (index := self._frames.get(frame_info.id)) is None:
+                index = self._add_frame(
+                    out,
+                    frame_info.filepath,
+                    frame_info.lineno,
+                    frame_info.indentation,
+                    frame_info.funcname,
+                )
+                if not frame_info.id.startswith('<'):  # see `FrameInfo.id`.
+                    self._frames[frame_info.id] = index
+            out += b'M'
+            out += _message_head.pack(time(), index, len(args))
+            for a in args:
+                _pack_arg(out, a)
+            if kwargs:
+                # the output stream is decided at render time.
+                kwargs = {
+                    k: v for k, v in kwargs.items()
+                    if k not in ('file', 'flush')
+                }
+            out += _uint.pack(len(kwargs))
+            for k, v in kwargs.items():
+                _pack_str(out, k)
+                _pack_arg(out, v)
+            self._file.write(out)
+            if flush:
+                self._file.flush()
+        return True
+    
+    def flush(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+    
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        atexit.unregister(self.close)
+    
+    def _add_frame(
+        self,
+        out: bytearray,
+        filepath: str,
+        lineno: int,
+        indentation: int,
+        funcname: str,
+        parent: int = -1,
+    ) -> int:
+        out += b'F'
+        out += _frame_head.pack(parent, lineno, indentation)
+        _pack_str(out, filepath)
+        _pack_str(out, funcname)
+        index = self._frame_count
+        self._frame_count += 1
+        return index
+    
+    def _add_frozen_frame(
+        self, out: bytearray, frame: FrozenFrameInfo
+    ) -> int:
+        parent = -1
+        if frame.parent:
+            parent = self._add_frozen_frame(out, frame.parent)
+        key = (
+            frame.filepath, frame.lineno, frame.indentation, frame.funcname,
+            parent
+        )
+        if (index := self._frames.get(key)) is None:
+            index = self._frames[key] = self._add_frame(out, *key)
+        return index
+    
+    @staticmethod
+    def _check_markup(markup: T.Markup) -> t.Tuple[bool, bool]:
+        if not markup:
+            return True, False
+        compiled = markup_analyzer.compile(markup)
+        capturable = not (
+            _live_meanings.intersection(compiled.static_meaning) or
+            any(mark == 't' for mark, _ in compiled.dynamic_marks)
+        )
+        return capturable, MarkMeaning.FLUSH in compiled.static_meaning
+
+
+def read_records(path: str) -> t.Iterator[T.Record]:
+    """
+    raises: ValueError if the file is not a capture file.
+    note: a truncated last record (e.g. the process was killed while -
+    writing) is ignored.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != _MAGIC:
+        raise ValueError('not an lk-logger capture file', path)
+    if data[4] != _VERSION:
+        raise ValueError('unsupported capture version', data[4])
+    
+    frames: t.List[FrozenFrameInfo] = []
+    pos = 5
+    try:
+        while pos < len(data):
+            kind = data[pos:pos + 1]
+            pos += 1
+            if kind == b'F':
+                parent, lineno, indentation = \
+                    _frame_head.unpack_from(data, pos)
+                pos += _frame_head.size
+                filepath, pos = _unpack_str(data, pos)
+                funcname, pos = _unpack_str(data, pos)
+                frames.append(FrozenFrameInfo(
+                    filepath, lineno, indentation, funcname,
+                    frames[parent] if parent >= 0 else None
+                ))
+            elif kind == b'M':
+                timestamp, index, argc = _message_head.unpack_from(data, pos)
+                pos += _message_head.size
+                args = []
+                for _ in range(argc):
+                    a, pos = _unpack_arg(data, pos)
+                    args.append(a)
+                kwargs = {}
+                kwargc, = _uint.unpack_from(data, pos)
+                pos += _uint.size
+                for _ in range(kwargc):
+                    k, pos = _unpack_str(data, pos)
+                    kwargs[k], pos = _unpack_arg(data, pos)
+                yield timestamp, frames[index], tuple(args), kwargs
+            else:
+                raise ValueError('broken record', kind, pos - 1)
+    except (IndexError, StructError, UnicodeDecodeError):
+        return  # truncated
+
+
+def render(path: str) -> None:
+    """
+    render captured messages through the normal logger, as if they were -
+    printed by the original call sites.
+    """
+    from .logger import logger  # lazy import, to avoid circular import.
+    for _, frame, args, kwargs in read_records(path):
+        logger.log(*args, _frame_info=frame, **kwargs)
+
+
+# -----------------------------------------------------------------------------
+
+def _pack_str(out: bytearray, s: str) -> None:
+    b = s.encode('utf-8', 'surrogatepass')
+    out += _uint.pack(len(b))
+    out += b
+
+
+def _pack_arg(out: bytearray, a: t.Any) -> None:
+    if a is None:
+        out += b'N'
+    elif a is True:
+        out += b'T'
+    elif a is False:
+        out += b'F'
+    elif type(a) is str:
+        out += b's'
+        _pack_str(out, a)
+    elif type(a) is int:
+        out += b'i'
+        _pack_str(out, str(a))
+    elif type(a) is float:
+        out += b'f'
+        out += _float.pack(a)
+    else:
+        out += b'r'
+        _pack_str(out, str(a))
+
+
+def _unpack_str(data: bytes, pos: int) -> t.Tuple[str, int]:
+    size, = _uint.unpack_from(data, pos)
+    pos += _uint.size
+    end = pos + size
+    if end > len(data):
+        raise IndexError(end)
+    return data[pos:end].decode('utf-8', 'surrogatepass'), end
+
+
+def _unpack_arg(data: bytes, pos: int) -> t.Tuple[t.Any, int]:
+    tag = data[pos:pos + 1]
+    pos += 1
+    if tag == b'N':
+        return None, pos
+    if tag == b'T':
+        return True, pos
+    if tag == b'F':
+        return False, pos
+    if tag in (b's', b'r'):
+        return _unpack_str(data, pos)
+    if tag == b'i':
+        x, pos = _unpack_str(data, pos)
+        return int(x), pos
+    if tag == b'f':
+        return _float.unpack_from(data, pos)[0], pos + _float.size
+    raise IndexError(tag)  # an empty tag means the data is truncated.
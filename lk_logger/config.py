@@ -6,17 +6,75 @@ from rich.traceback import Traceback
 
 from .console import console
 from .printer import dprint  # noqa
+from .sourcemap import sourcemap
 
 
 class LoggingConfig:
+    batch_size: int
+    #   (only works in subthreaded mode.) the max number of queued messages -
+    #   the background thread renders together and writes to terminal in -
+    #   one call. 1 means no batching.
+    batch_timeout: float
+    #   (only works when `batch_size` > 1.) the max seconds the background -
+    #   thread waits for more messages to fill up a batch. 0 means just take -
+    #   what is already queued.
+    capture_file: t.Optional[str]
+    #   if set, messages are not rendered, but captured to this file in a -
+    #   compact binary format. render them later by -
+    #   `py -m lk_logger render <file>`. see `.capture` for details.
     clear_unfinished_stream: bool
     console_width: t.Optional[int]
+    dedup: bool
+    #   collapse consecutive identical messages from the same call site into -
+    #   a summary like '(repeated 12,345 times in 2.0s)'. only messages -
+    #   whose arguments are all str, int, float, bool or None are compared.
+    min_verbosity: int
+    #   drop messages whose verbosity (`:v<n>`) is lower than this. messages -
+    #   without a verbosity mark are never dropped. 0 means no filtering.
+    #   the check is done before building the message, so a dropped call -
+    #   costs little more than a frame lookup.
+    #   to set it for a path or module, see `..deflector.Deflector -
+    #   .set_min_verbosity`.
+    multithread: bool
+    #   (only works in subthreaded mode, with `queue_size` = 0.) for many -
+    #   threads logging at the same time. each thread appends messages to -
+    #   its own buffer without locking, the background thread merges the -
+    #   buffers in the order the messages were logged (by a global sequence -
+    #   number).
     path_style: t.Literal['filename', 'relpath']
     #   'relpath' (default): show relative path.
     #       for external libraries, will show `[lib_name]/relpath:lineno`
     #   'filename': show only filename.
     #       for external libraries, will show `[lib_name]/filename:lineno`
+    queue_overflow: t.Literal['block', 'drop_newest', 'drop_oldest', 'sample']
+    #   (only works when `queue_size` > 0.) what to do when the queue is full:
+    #   'block': the producer waits until there is room.
+    #   'drop_newest': discard the incoming message.
+    #   'drop_oldest': discard the oldest queued message to make room.
+    #   'sample': keep one of every ten incoming messages (discarding the -
+    #       oldest queued one to make room), discard the others.
+    #   the count of dropped messages is reported on flush and process exit.
+    queue_size: int
+    #   (only works in subthreaded mode.) the max number of messages waiting -
+    #   in the background queue. 0 means unbounded.
+    rate_limit: int
+    #   the max number of messages per second from the same call site. the -
+    #   exceeding ones are dropped and summarized like '(suppressed 1,234 -
+    #   messages in 1.0s)'. 0 means no limit.
     rich_traceback: bool
+    sampling: float
+    #   keep only a part of the messages from each call site:
+    #   n >= 2: keep 1 in n calls (the 1st, the n+1th, ...).
+    #   0 < x < 1: keep each call by the probability of x.
+    #   0 or 1: no sampling.
+    #   the decision is made before anything else, so a dropped call is -
+    #   cheap. the counts are reported at exit.
+    sampling_markups: t.Dict[str, float]
+    #   sampling for messages with specific markups (exactly matched), it -
+    #   overrides `sampling`. for example `{':v0': 100}` keeps 1 in 100 -
+    #   debug messages of each call site. None means no markup specific -
+    #   sampling, it is normalized to an empty dict (a fresh one for each -
+    #   config, the given dict is copied as well).
     separator: str
     show_funcname: bool
     show_source: bool
@@ -39,14 +97,40 @@ class LoggingConfig:
     #   enabled: (red text) '[ERROR] some error happens'
     #   disabled: (red text) 'some error happens'
     sourcemap_alignment: t.Literal['left', 'right']
+    sourcemap_backend: t.Literal['ast', 'scanner']
+    #   (only works when `show_varnames` is True.)
+    #   how to find varnames in print calls.
+    #   'ast': use python's own parser (see `.scanner.ast_scanner`). it also -
+    #       indexes calls like `if x: print(x)` and `logger.log(x)`.
+    #   'scanner': the classic bracket-pairing scanner (see `.scanner`).
+    sourcemap_cache: bool
+    #   persist the varnames index of source files in the user's cache -
+    #   directory (e.g. '~/.cache/lk-logger', see `.cache.sourcemap`), so -
+    #   that later processes skip scanning unchanged files.
+    sourcemap_indexing: t.Literal['file', 'line']
+    #   (only works when `show_varnames` is True.)
+    #   'file': scan the whole source file on its first print.
+    #   'line': scan only the print call at the requested line, on demand. -
+    #       this avoids a visible pause on the first print of big modules.
     subthreaded: bool
     #   run lk logger in separate thread.
     
     _preset_conf = {
+        'batch_size'             : 1,
+        'batch_timeout'          : 0.0,
+        'capture_file'           : None,
         'clear_unfinished_stream': False,
         'console_width'          : None,
+        'dedup'                  : False,
+        'min_verbosity'          : 0,
+        'multithread'            : False,
         'path_style'             : 'relpath',
+        'queue_overflow'         : 'block',
+        'queue_size'             : 0,
+        'rate_limit'             : 0,
         'rich_traceback'         : True,
+        'sampling'               : 0,
+        'sampling_markups'       : None,
         'separator'              : ';   ',
         'show_funcname'          : False,
         'show_source'            : True,
@@ -54,6 +138,9 @@ class LoggingConfig:
         'show_varnames'          : False,
         'show_verbosity_tag'     : False,
         'sourcemap_alignment'    : 'left',
+        'sourcemap_backend'      : 'scanner',
+        'sourcemap_cache'        : True,
+        'sourcemap_indexing'     : 'file',
         'subthreaded'            : False,  # TODO
     }
     
@@ -74,7 +161,9 @@ class LoggingConfig:
             if v != getattr(self, k, None):
                 self._apply(k, v)
     
-    def _apply(self, key: str, val: t.Union[bool, int, str]) -> None:
+    def _apply(self, key: str, val: t.Union[bool, float, int, str]) -> None:
+        if key == 'sampling_markups':
+            val = dict(val or {})
         setattr(self, key, val)
         if key == 'console_width':
             if val and isinstance(val, int):
@@ -84,6 +173,16 @@ class LoggingConfig:
                 sys.excepthook = self._custom_excepthook
             else:
                 sys.excepthook = _default_excepthook
+        elif key == 'sourcemap_backend':
+            # the indexed varnames depend on the backend and the indexing -
+            # mode, don't mix them.
+            sourcemap.clear()
+            sourcemap.backend = val
+        elif key == 'sourcemap_cache':
+            sourcemap.persistent_cache.enabled = val
+        elif key == 'sourcemap_indexing':
+            sourcemap.clear()
+            sourcemap.indexing = val
     
     def _custom_excepthook(self, type_, value, traceback) -> None:
         # print(':r', '[red dim]drain out message queue[/]')
@@ -25,6 +25,23 @@ class Console(BaseConsole):
         #   split sourcemap and message into different lines.
         pass
     
+    @property
+    def is_plain(self) -> bool:
+        """
+        whether nothing styled would be rendered (for example stdout is -
+        redirected to a file, or color is disabled), so that a message can be -
+        written to `self.file` as plain text. see `MessageBuilder -
+        .compose_plain`.
+        """
+        return (
+            self.color_system is None and
+            not self.record and
+            not self.quiet and
+            not self.is_jupyter and
+            not self._buffer_index and
+            not getattr(self, '_live_stack', getattr(self, '_live', None))
+        )
+    
     def print(
         self,
         *objects: Any,
@@ -44,6 +61,14 @@ class Console(BaseConsole):
             super().print(
                 *objects, crop=crop, soft_wrap=soft_wrap, **kwargs
             )
+    
+    def write_plain(
+        self, text: str, end: str = '\n', flush: bool = False
+    ) -> None:
+        with self._lock:
+            self.file.write(text + end)
+            if flush:
+                self.file.flush()
 
 
 console = Console()
@@ -37,6 +37,26 @@ def setup(*, quiet: bool = False, clear_preset: bool = False, **kwargs) -> None:
         print('lk-logger is ready', ':v3sp')
 
 
+def setup_async(
+    *, quiet: bool = False, clear_preset: bool = False, **kwargs
+) -> None:
+    """
+    like `setup`, but `print` goes through `.async_logger.async_logger`, -
+    which doesn't block the event loop.
+    note: `subthreaded` defaults to False here, the async logger has its -
+    own writer thread already.
+    """
+    from .async_logger import async_logger  # lazy import
+    kwargs.setdefault('subthreaded', False)
+    setup(quiet=True, clear_preset=clear_preset, **kwargs)
+    setattr(builtins, 'print', async_logger.log)
+    if not quiet:
+        global _has_welcome_message_shown
+        if not _has_welcome_message_shown:
+            _has_welcome_message_shown = True
+            print('lk-logger is ready (async)', ':v3sp')
+
+
 def update(clear_preset: bool = False, **kwargs) -> None:
     logger.configure(clear_preset, **kwargs)
 
@@ -74,18 +94,26 @@ def counting() -> t.Iterator[None]:
 # noinspection PyProtectedMember
 @contextmanager
 def delay() -> t.Iterator[None]:
-    logger._control['stash_outputs'] = True
-    yield
-    logger._control['stash_outputs'] = False
-    print(':fs')
+    """
+    hold all messages in the scope, and print them at once when leaving. -
+    it can be nested, messages are printed when the outermost one exits.
+    """
+    logger._push_stash()
+    try:
+        yield
+    finally:
+        logger._pop_stash()
+        print(':fs')
 
 
 # noinspection PyProtectedMember
 @contextmanager
 def elevate_caller_stack() -> t.Iterator[None]:
-    logger._control['caller_layer_offset'] += 1
-    yield
-    logger._control['caller_layer_offset'] -= 1
+    logger._local.caller_layer_offset += 1
+    try:
+        yield
+    finally:
+        logger._local.caller_layer_offset -= 1
 
 
 class _Mute:
@@ -110,6 +138,23 @@ class _Mute:
 mute = _Mute()
 
 
+def set_min_verbosity(
+    level: t.Optional[int], source: t.Union[str, object] = None
+) -> None:
+    """
+    drop messages whose verbosity (`:v<n>`) is lower than `level`.
+    
+    params:
+        level: 0 to 9. 0 or None means no filtering.
+        source: None for global, or a path or module object. see `.deflector -
+            .Deflector.set_min_verbosity`.
+    """
+    if source is None:
+        logger.configure(min_verbosity=level or 0)
+    else:
+        deflector.set_min_verbosity(source, level)
+
+
 @contextmanager
 def timing(sum_up: bool = False, exit_msg: str = None) -> t.Iterator[None]:
     markup_analyzer._simple_time = time()
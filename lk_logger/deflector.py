@@ -2,7 +2,11 @@ import typing as t
 from collections import namedtuple
 from os.path import abspath
 from os.path import dirname
+from types import FrameType
 
+from .frame_info import new_code_cache
+from .frame_info import track_code
+from .path_helper import path_router
 from .printer import dbg_print  # noqa
 from .printer import non_print
 from .printer import std_print
@@ -10,7 +14,10 @@ from .printer import std_print
 
 class T:
     PrintFunc = t.Optional[t.Callable]
-    PathToFunc = t.Dict[str, PrintFunc]
+    Route = t.Tuple[PrintFunc, t.Optional[int]]
+    #   (print func, min verbosity), see `check_path` and `get_min_verbosity`.
+    Routes = t.Dict[int, Route]
+    #   {id(code): route, ...}. see `..frame_info.new_code_cache`.
     SearchRoots = t.NamedTuple('SearchRoots', (
         ('abspath', t.Dict[str, PrintFunc]),
         ('libname', t.Dict[str, PrintFunc]),
@@ -22,29 +29,27 @@ SearchRoots = namedtuple('SearchRoots', 'abspath libname')
 
 
 class Deflector:
-    _cached_paths: T.PathToFunc
+    """
+    the rules are stored in `..path_helper.path_router`, slots 'print' and -
+    'verbosity'.
+    """
+    _min_verbosities: t.Dict[str, int]  # {root path: min verbosity, ...}
+    _routes: T.Routes
     _search_roots: T.SearchRoots
     
     def __init__(self) -> None:
-        self._cached_paths = {}
+        self._min_verbosities = {}
+        self._routes = new_code_cache()
         self._search_roots = SearchRoots({}, {})
-        
+    
     def add(
         self,
         source: t.Union[str, object],
         print_func: t.Optional[t.Callable] = std_print,
         scope: bool = False,
     ) -> None:
-        if isinstance(source, str):
-            if source.startswith('['):
-                path = source
-            else:
-                path = _normpath(source)
-        else:
-            path = _normpath(source.__file__)
-            if scope:
-                path = dirname(path)
-                
+        path = _get_source_path(source, scope)
+        
         if print_func is None:
             print_func = non_print
         
@@ -52,8 +57,9 @@ class Deflector:
             self._search_roots.libname[path] = print_func
         else:
             self._search_roots.abspath[path] = print_func
-        self._cached_paths[path] = print_func
-        
+            path_router.add('print', path, print_func)
+        self.clear_routes()
+    
     def check_lib(self, libname: str) -> T.PrintFunc:
         return self._search_roots.libname.get(libname)
     
@@ -64,22 +70,89 @@ class Deflector:
         # exclusive for ipython.
         if path.startswith('<ipython-input'):
             return std_print
-        # the path is an absolute path.
-        path = _normpath(path)
-        # dbg_print(path)
-        if path in self._cached_paths:
-            # dbg_print('path in cache', path, self._cache[path])
-            return self._cached_paths[path]
-        for root, prt in self._search_roots.abspath.items():
-            if path.startswith(root):
-                self._cached_paths[path] = prt
-                # dbg_print('use custom print', path)
-                return prt
-        self._cached_paths[path] = None
+        if x := path_router.match(path).get('print'):
+            # dbg_print('use custom print', path, x[0])
+            return x[1]
         return None
     
+    def route(self, frame: FrameType) -> T.Route:
+        """
+        the same as `check_path` and `get_min_verbosity`, but decided once -
+        per code object, which skips resolving the frame's path on later -
+        calls. see also `clear_routes`.
+        """
+        code = frame.f_code
+        try:
+            return self._routes[id(code)]
+        except KeyError:
+            pass
+        # see `..frame_info.FrameInfo.filepath`.
+        path = frame.f_globals.get('__file__', code.co_filename)
+        if path.startswith('<') and path.endswith('>'):
+            # not cached, e.g. ipython cells.
+            return self.check_path(path), None
+        out = (self.check_path(path), self.get_min_verbosity(path))
+        track_code(code)
+        self._routes[id(code)] = out
+        return out
+    
+    def clear_routes(self) -> None:
+        """
+        forget the decisions of `route`.
+        """
+        self._routes.clear()
+    
     def mute(self, source: t.Union[str, object]) -> None:
         self.add(source, print_func=non_print, scope=True)
+    
+    def set_min_verbosity(
+        self,
+        source: t.Union[str, object],
+        level: t.Optional[int],
+        scope: bool = True,
+    ) -> None:
+        """
+        drop messages whose verbosity (`:v<n>`) is lower than `level`, for -
+        messages from the given source. it overrides `LoggingConfig -
+        .min_verbosity`. if multiple sources match a path, the longest one -
+        wins.
+        
+        params:
+            source: a path (file or directory), or a module object.
+            level: 0 to 9, or None to remove the setting of `source`.
+            scope: if source is a module object, apply to its whole -
+                directory (i.e. the package it belongs to).
+        """
+        path = _get_source_path(source, scope)
+        if level is None:
+            self._min_verbosities.pop(path, None)
+            path_router.remove('verbosity', path)
+        else:
+            self._min_verbosities[path] = level
+            path_router.add('verbosity', path, level)
+        self.clear_routes()
+    
+    def get_min_verbosity(self, path: str) -> t.Optional[int]:
+        """
+        returns: None if no source matches the path.
+        """
+        if path.startswith('<'):
+            # see `..frame_info.FrameInfo.filepath`.
+            return None
+        if x := path_router.match(path).get('verbosity'):
+            return x[1]
+        return None
+
+
+def _get_source_path(source: t.Union[str, object], scope: bool) -> str:
+    if isinstance(source, str):
+        if source.startswith('['):
+            return source
+        return _normpath(source)
+    path = _normpath(source.__file__)
+    if scope:
+        path = dirname(path)
+    return path
 
 
 def _normpath(path: str) -> str:
@@ -0,0 +1,262 @@
+"""
+write messages to a file as json lines, alongside console output.
+
+unlike `.printer.parallel_printing`, which only receives the message text, -
+a sink receives the structured info that the logger has already computed -
+(source path, line number, function name, verbosity and timestamp), so that -
+log shippers can ingest it without parsing.
+
+each line is a json object like:
+    {"time": 1700000000.123456, "level": "warn", "verbosity": 6,
+     "file": "/home/me/project/main.py", "line": 12, "function": "main",
+     "message": "..."}
+    note:
+        - "file", "line" and "function" follow the `show_source` and -
+            `show_funcname` options of the logger. they are null if not -
+            shown.
+        - "file" is the absolute path of the caller's file (see -
+            `.frame_info.FrameInfo.filepath`), not the shortened one shown -
+            in the console. it may be like '<stdin>' for code without a file.
+
+records are buffered and written in batches. in subthreaded mode, the -
+background thread writes them when it has drained the queue, so a burst of -
+messages costs only one `write` call.
+
+usage:
+    import lk_logger
+    lk_logger.setup()
+    
+    # for the whole process (closed at exit):
+    lk_logger.add_file_sink('logs/app.jsonl', max_bytes=10 * 1024 * 1024)
+    
+    # or in a scope:
+    with lk_logger.file_sink('logs/task.jsonl', rotate_interval=3600):
+        print(':v4', 'done')
+
+test case:
+    tests/file_sink.py
+"""
+import atexit
+import json
+import os
+import typing as t
+from contextlib import contextmanager
+from threading import Lock
+from time import time
+
+
+class T:
+    Info = t.Dict[str, t.Any]  # see `.message_builder.T.Info`
+    Level = t.Optional[int]  # verbosity, see `.markup.MarkMeaning.VERBOSITY`
+    Record = t.Tuple[float, Info, Level, str]
+    #   (timestamp, info, level, filepath)
+
+
+# indexed by verbosity, see `.message_formatter.MessageFormatter._level_2_tag`.
+# levels beyond the table (`:v9`) use the last name.
+_level_names = (
+    'debug', 'info', 'info', 'info', 'info', 'warn', 'warn', 'error', 'error'
+)
+
+
+class JsonLinesSink:
+    """
+    params:
+        path: the file to append to. its parent directory is created if not -
+            exists.
+        buffer_size: how many records to buffer before writing them out. 1 -
+            means write each record immediately.
+        flush_interval: the max seconds a record may stay in the buffer. -
+            it is checked when a new record comes in.
+        max_bytes: rotate the file when it would exceed this size. 0 means -
+            no size limit.
+        rotate_interval: rotate the file when it has been opened for this -
+            many seconds. 0 means no time limit.
+        backup_count: how many rotated files to keep, named `<path>.1`, -
+            `<path>.2`, ... (the bigger the older). 0 means the file is just -
+            truncated on rotation.
+    """
+    _buffer: t.List[str]
+    _file: t.Optional[t.TextIO]
+    _last_flush: float
+    _lock: Lock
+    _opened_at: float
+    _size: int
+    
+    def __init__(
+        self,
+        path: str,
+        buffer_size: int = 64,
+        flush_interval: float = 1.0,
+        max_bytes: int = 0,
+        rotate_interval: float = 0,
+        backup_count: int = 5,
+    ) -> None:
+        self.path = os.path.abspath(path)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self._buffer = []
+        self._file = None
+        self._last_flush = time()
+        self._lock = Lock()
+        self._opened_at = 0.0
+        self._size = 0
+    
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+    
+    def emit(self, record: T.Record, message: str) -> None:
+        timestamp, info, level, filepath = record
+        line = json.dumps(
+            {
+                'time'     : timestamp,
+                'level'    : None if level is None else _level_names[
+                    min(level, len(_level_names) - 1)
+                ],
+                'verbosity': level,
+                'file'     : filepath if info['file_path'] else None,
+                'line'     : (
+                    int(info['line_number']) if info['file_path'] else None
+                ),
+                'function' : info['function_name'] or None,
+                'message'  : message,
+            },
+            ensure_ascii=False,
+            default=str,
+        ) + '\n'
+        with self._lock:
+            self._buffer.append(line)
+            if (
+                len(self._buffer) >= self.buffer_size or
+                time() - self._last_flush >= self.flush_interval
+            ):
+                self._write_buffer()
+    
+    def flush(self) -> None:
+        with self._lock:
+            if self._buffer:
+                self._write_buffer()
+            if self._file:
+                self._file.flush()
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._buffer:
+                self._write_buffer()
+            if self._file:
+                self._file.close()
+                self._file = None
+    
+    def _write_buffer(self) -> None:
+        """
+        note: must be called with `self._lock` held.
+        """
+        data = ''.join(self._buffer)
+        self._buffer.clear()
+        self._last_flush = time()
+        if self._file is None:
+            self._open()
+        size = len(data.encode())
+        if self._should_rotate(size):
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += size
+    
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+        self._opened_at = time()
+    
+    def _should_rotate(self, incoming_size: int) -> bool:
+        if (
+            self.max_bytes > 0 and
+            self._size > 0 and
+            self._size + incoming_size > self.max_bytes
+        ):
+            return True
+        if (
+            self.rotate_interval > 0 and
+            time() - self._opened_at >= self.rotate_interval
+        ):
+            return True
+        return False
+    
+    def _rotate(self) -> None:
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(src := f'{self.path}.{i}'):
+                    os.replace(src, f'{self.path}.{i + 1}')
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self._open()
+
+
+class SinkManager:
+    _sinks: t.Tuple[JsonLinesSink, ...]
+    
+    def __init__(self) -> None:
+        self._sinks = ()
+        # note: this module is imported before the logger is created, so -
+        #   this runs after the logger has drained its queue at exit. (atexit -
+        #   callbacks are called in reverse order.)
+        atexit.register(self.close_all)
+    
+    @property
+    def sinks(self) -> t.Tuple[JsonLinesSink, ...]:
+        return self._sinks
+    
+    def add(self, sink: JsonLinesSink) -> None:
+        self._sinks += (sink,)
+    
+    def remove(self, sink: JsonLinesSink) -> None:
+        self._sinks = tuple(x for x in self._sinks if x is not sink)
+        sink.close()
+    
+    def emit(self, record: T.Record, message: str) -> None:
+        for s in self._sinks:
+            s.emit(record, message)
+    
+    def flush_all(self) -> None:
+        for s in self._sinks:
+            s.flush()
+    
+    def close_all(self) -> None:
+        for s in self._sinks:
+            s.close()
+
+
+sink_manager = SinkManager()
+
+
+def add_file_sink(path: str, **kwargs) -> JsonLinesSink:
+    """
+    kwargs: see `JsonLinesSink`.
+    """
+    sink = JsonLinesSink(path, **kwargs)
+    sink_manager.add(sink)
+    return sink
+
+
+# noinspection PyProtectedMember
+@contextmanager
+def file_sink(path: str, **kwargs) -> t.Iterator[JsonLinesSink]:
+    """
+    kwargs: see `JsonLinesSink`.
+    """
+    from .logger import logger  # lazy import, to avoid circular import.
+    sink = add_file_sink(path, **kwargs)
+    try:
+        yield sink
+    finally:
+        if hasattr(logger, '_wait_drained'):
+            # messages logged in the scope may be still in the queue.
+            logger._wait_drained()
+        sink_manager.remove(sink)
@@ -1,10 +1,14 @@
-import inspect
+import sys
 import typing as t
 from dataclasses import dataclass
-from functools import cache
 from functools import cached_property
+from functools import partial
+from itertools import islice
+from linecache import checkcache
 from textwrap import dedent
+from types import CodeType
 from types import FrameType
+from weakref import ref
 
 from .markup import MarkMeaning
 from .markup import T as T0
@@ -24,6 +28,52 @@ class T:
     RawArgs = t.Tuple[t.Any, ...]
 
 
+# call site caches. a code object always belongs to the same file, and an -
+# instruction offset (`f_lasti`) always belongs to the same line, so repeated -
+# calls from the same call site can skip path normalization and string -
+# building. the results are interned to make later dict lookups cheap.
+# note: `FrameInfo.filepath` and `.id` are plain properties backed by these -
+# caches, `cached_property` would cost more (it takes a lock in python 3.11).
+# note: code objects are keyed by `id`, because two code objects compare -
+# equal if they have the same bytecode, even in different files. an entry is -
+# removed once its code object is freed (see `track_code`), so an id is never -
+# mistaken for another code object's, and `exec`'d code doesn't leak.
+_filepaths: t.Dict[int, str] = {}  # {id(code): filepath, ...}
+_frame_ids: t.Dict[int, t.Dict[int, str]] = {}
+#   {id(code): {f_lasti: frame id, ...}, ...}
+_code_caches: t.List[dict] = [_filepaths, _frame_ids]
+_code_refs: t.Dict[int, ref] = {}
+
+
+def new_code_cache() -> dict:
+    """
+    a dict keyed by `id(code)`, like `_filepaths`. call `track_code` before -
+    adding an entry.
+    """
+    _code_caches.append(out := {})
+    return out
+
+
+def track_code(code: CodeType) -> None:
+    """
+    remove the entries of `code` from `_code_caches` when it is freed.
+    """
+    if (key := id(code)) not in _code_refs:
+        _code_refs[key] = ref(code, partial(_forget_code, key))
+
+
+def _forget_code(
+    key: int,
+    _: ref = None,
+    _refs: dict = _code_refs,
+    _caches: t.List[dict] = _code_caches,
+) -> None:
+    # the defaults keep the references alive during interpreter shutdown.
+    _refs.pop(key, None)
+    for cache in _caches:
+        cache.pop(key, None)
+
+
 class FrameInfo:
     
     def __init__(self, frame: FrameType) -> None:
@@ -32,7 +82,7 @@ class FrameInfo:
     def __str__(self) -> str:
         return self.info
     
-    @cached_property
+    @property
     def filepath(self) -> str:
         """
         note:
@@ -47,29 +97,72 @@ class FrameInfo:
         # debug(self._frame.f_code.co_filename,
         #       self._frame.f_globals.get('__file__'))
         # # x = self._frame.f_code.co_filename
-        x = self._frame.f_globals.get(
-            '__file__', self._frame.f_code.co_filename
-        )
+        code = self._frame.f_code
+        if x := _filepaths.get(id(code)):
+            return x
+        x = self._frame.f_globals.get('__file__', code.co_filename)
         if x.startswith('<') and x.endswith('>'):
+            # not cached, it varies from frame to frame.
             return '<{}@{}>'.format(x[1:-1], id(self._frame))
         else:
-            return normpath(x)
+            # a new code object, the module may be reloaded from a changed -
+            # source. see `..sourcemap.SourceMap.get_indentation`.
+            checkcache(code.co_filename)
+            x = sys.intern(normpath(x))
+            track_code(code)
+            _filepaths[id(code)] = x
+            return x
+    
+    @property
+    def call_site(self) -> t.Hashable:
+        """
+        a cheap key of the call site, without resolving the file path and -
+        line number. see also `id`.
+        """
+        return id(self._frame.f_code), self._frame.f_lasti
+    
+    @cached_property
+    def end_lineno(self) -> t.Optional[int]:
+        """
+        the last line of the current call expression (e.g. a multi-line -
+        `print(...)`), from code object's position info. only available in -
+        python 3.11+, otherwise returns None.
+        """
+        code = self._frame.f_code
+        if not hasattr(code, 'co_positions'):
+            return None
+        # each position entry is for a 2-byte code unit.
+        pos = next(
+            islice(code.co_positions(), self._frame.f_lasti // 2, None), None
+        )
+        return pos and pos[1]
     
     @cached_property
     def funcname(self) -> str:
         return self._frame.f_code.co_name
     
-    @cached_property
+    @property
     def id(self) -> str:
-        return f'{self.filepath}:{self.lineno}'
+        code = self._frame.f_code
+        lasti = self._frame.f_lasti
+        if (ids := _frame_ids.get(id(code))) and (x := ids.get(lasti)):
+            return x
+        x = f'{self.filepath}:{self.lineno}'
+        if not x.startswith('<'):
+            x = sys.intern(x)
+            if ids is None:
+                track_code(code)
+                ids = _frame_ids[id(code)] = {}
+            ids[lasti] = x
+        return x
     
     @cached_property
     def indentation(self) -> int:
-        # https://stackoverflow.com/a/39172552
-        if x := inspect.getframeinfo(self._frame).code_context:
-            ctx = x[0]
-            return len(ctx) - len(ctx.lstrip())
-        return 0
+        return sourcemap.get_indentation(
+            self._frame.f_code.co_filename,
+            self.lineno,
+            self._frame.f_globals,
+        )
     
     @cached_property
     def info(self) -> str:
@@ -91,11 +184,13 @@ class FrameInfo:
     def parent(self) -> t.Optional['FrameInfo']:
         return self.get_parent(1)
     
-    @cache
     def collect_varnames(self) -> T.VarNames:
+        if sourcemap.indexing == 'line':
+            return sourcemap.get_varnames(
+                self.filepath, self.lineno, self.end_lineno
+            )
         return sourcemap.get_varnames(self.filepath, self.lineno)
     
-    @cache
     def get_parent(self, traceback_level: int = 1) -> t.Optional['FrameInfo']:
         if x := _get_parent_frame(self._frame, traceback_level):
             return FrameInfo(x)
@@ -103,12 +198,12 @@ class FrameInfo:
 
 
 # -----------------------------------------------------------------------------
-# DELETE?
 
 @dataclass
 class FrozenFrameInfo:
     """
     this is picklable. used for multiprocessing queue.
+    see also `.multiprocess`.
     """
     filepath: str
     lineno: int
@@ -116,31 +211,57 @@ class FrozenFrameInfo:
     funcname: str
     _parent: 'FrozenFrameInfo' = None
     
+    @property
+    def call_site(self) -> t.Hashable:
+        return self.id
+    
     @property
     def id(self) -> str:
         return f'{self.filepath}:{self.lineno}'
     
+    @property
+    def parent(self) -> t.Optional['FrozenFrameInfo']:
+        return self._parent
+    
     def collect_varnames(self) -> T.VarNames:
         return sourcemap.get_varnames(self.filepath, self.lineno)
     
-    def get_parent(self, _) -> 'FrozenFrameInfo':
-        assert self._parent
-        return self._parent
+    def get_parent(
+        self, traceback_level: int = 1
+    ) -> t.Optional['FrozenFrameInfo']:
+        """
+        note: only the layers frozen by `freeze_frame_info(...,
+        _traceback_level)` are available.
+        """
+        out = self
+        for _ in range(traceback_level):
+            if out is None:
+                break
+            out = out._parent
+        return out
 
 
 def freeze_frame_info(
     frame: FrameType,
     _traceback_level: int = 0,
 ) -> FrozenFrameInfo:
-    info = FrameInfo(frame)
+    """
+    params:
+        _traceback_level: how many parent layers to freeze along with.
+    """
+    # read the frame directly, `FrameInfo`'s cached properties are slower -
+    # for a one-off use.
+    code = frame.f_code
+    lineno = frame.f_lineno
     return FrozenFrameInfo(
-        info.filepath,
-        info.lineno,
-        info.indentation,
-        info.funcname,
+        FrameInfo(frame).filepath,
+        lineno,
+        sourcemap.get_indentation(code.co_filename, lineno, frame.f_globals),
+        code.co_name,
         (
             _traceback_level > 0 and
-            freeze_frame_info(_get_parent_frame(frame, _traceback_level)) or
+            frame.f_back is not None and
+            freeze_frame_info(frame.f_back, _traceback_level - 1) or
             None
         )
     )
@@ -1,28 +1,49 @@
 import atexit
+import os
+import sys
 import typing as t
 from collections import deque
 from inspect import currentframe
+from itertools import chain
+from itertools import count
+from operator import itemgetter
+from random import random
+from threading import Condition
+from threading import Lock
+from threading import RLock
 from threading import Thread
-from time import sleep
+from threading import current_thread
+from threading import local
+from time import perf_counter
+from time import time
 
 from rich.console import RenderableType
+from rich.segment import Segment
+from rich.segment import Segments
+from rich.text import Text
 from rich.traceback import Traceback
 
 from .cache import LoggingCache
+from .cache.legacy import T as T2
 from .config import LoggingConfig
+from .console import console
 from .deflector import deflector
+from .file_sink import sink_manager
 from .frame_info import FrameInfo
 from .frame_info import FrozenFrameInfo
+from .markup import CompiledMarkup
 from .markup import MarkMeaning
 from .markup import markup_analyzer
 from .markup import T as T0
 from .message_builder import MessageStruct
+from .message_builder import PlainMessage
 from .message_builder import T as T1
 from .message_builder import builder as msg_builder
 from .message_formatter import formatter as msg_formatter
 from .path_helper import path_helper
 from .printer import con_print
 from .printer import dbg_print  # noqa
+from .printer import non_print
 from .printer import printer_manager
 from .printer import std_print
 
@@ -36,10 +57,17 @@ class _NoMessage:
     pass
 
 
+class _ThreadState(local):
+    # class attributes are the default values of each thread.
+    buffer: t.Optional[deque] = None  # see `SubThreadLogger._enqueue_nowait`.
+    caller_layer_offset: int = 0  # see `.control.elevate_caller_stack`.
+
+
 class T:  # Typehint
     Args = t.Tuple[t.Any, ...]
+    CompiledMarkup = CompiledMarkup
     ComposedMessage = t.Union[
-        RenderableType, T1.MessageStruct, Traceback,
+        RenderableType, T1.MessageStruct, T1.PlainMessage, Traceback,
         t.Type[_NoMessage], _RawArgs
     ]
     FlushScheme = int
@@ -51,17 +79,47 @@ class T:  # Typehint
     Info = T1.Info
     Markup = T0.Markup
     MarkupPos = int  # -1, 0, 1
+    MarksMeaning = T0.MarksMeaning
+    Throttle = T2.Throttle
+    QueueItem = t.Tuple[
+        t.Union[ComposedMessage, Args],  # message or raw args
+        t.Dict[str, t.Any],  # kwargs
+        t.Optional[t.Callable],  # custom print
+    ]
+    BufferedItem = t.Tuple[int, QueueItem]  # (sequence number, item)
+
+
+_dedup_types = (bool, float, int, str, type(None))
+# the caches below are looked up inline on the hot path of a dropped or -
+# muted call, where a function call costs more than the rest.
+# noinspection PyProtectedMember
+_compiled_markups = markup_analyzer._compiled
+# noinspection PyProtectedMember
+_routes = deflector._routes  # see `MainThreadLogger.log`.
+_get_compiled = markup_analyzer.get_compiled
+_throttle_window = 1.0  # seconds. see `MainThreadLogger._is_throttled`.
 
 
 class MainThreadLogger:
     
     def __init__(self) -> None:
         self._cache = LoggingCache()
+        self._capture = None
         self._config = LoggingConfig()
-        self._control = {'caller_layer_offset': 0, 'stash_outputs': False}
-        self._message_queue = deque()
+        self._local = _ThreadState()
+        self._last_throttled = None  # frame id, see `_is_throttled`.
+        self._sampling = {'counts': {}, 'total': 0, 'kept': 0}
+        # composed messages held by `.control.delay`, see `_push_stash`.
+        self._stash = deque()
+        self._stash_depth = 0
+        self._stash_lock = Lock()
+        # guards the counters of `_is_sampled` and `_is_throttled`. it is -
+        # reentrant because a report may be printed while holding it.
+        self._state_lock = RLock()
+        atexit.register(self._report_at_exit)
     
     def configure(self, clear_preset: bool = False, **kwargs) -> None:
+        self._report_throttled()  # the counts are stored in cache.
         self._cache.clear_cache()
         if clear_preset:
             self._config.reset()
@@ -69,34 +127,79 @@ class MainThreadLogger:
             kwargs['show_varnames'] = kwargs.pop('show_varname')
         self._config.update(**kwargs)
         msg_builder.update_config(separator=self._config.separator)
+        self._update_capture()
     
     @property
     def config(self) -> dict:
         return self._config.to_dict()
     
+    def _update_capture(self) -> None:
+        path = self._config.capture_file
+        if self._capture and (
+            not path or os.path.abspath(path) != self._capture.path
+        ):
+            self._capture.close()
+            self._capture = None
+        if path and not self._capture:
+            # lazy import. most users don't need it.
+            from .capture import CaptureWriter
+            self._capture = CaptureWriter(path)
+    
     # -------------------------------------------------------------------------
     
     def log(
         self, *args: t.Any, _frame_info: T.FrameInfo = None, **kwargs
     ) -> None:
         if _frame_info is None:
-            _frame_info = FrameInfo(currentframe().f_back)
+            # `sys._getframe` is much cheaper than `inspect.currentframe`.
+            frame = sys._getframe(1)
+            if (route := _routes.get(id(frame.f_code))) is None:
+                route = deflector.route(frame)
+            custom_print, min_verbosity = route
+            if custom_print:
+                if custom_print is not non_print:  # muted, skip the call.
+                    custom_print(*args, **kwargs)
+                return
+            if min_verbosity is None:
+                min_verbosity = self._config.min_verbosity
+            if min_verbosity and self._is_below_min_verbosity(
+                args, min_verbosity
+            ):
+                return
+            _frame_info = FrameInfo(frame)
+        else:
+            if (path := _frame_info.filepath) and (
+                custom_print := deflector.check_path(path)
+            ):
+                custom_print(*args, **kwargs)
+                return
+            if (min_verbosity := deflector.get_min_verbosity(path)) is None:
+                min_verbosity = self._config.min_verbosity
+            if min_verbosity and self._is_below_min_verbosity(
+                args, min_verbosity
+            ):
+                return
+        if (
+            (self._config.sampling or self._config.sampling_markups) and
+            not self._is_sampled(_frame_info, args)
+        ):
+            return
         
         if (
-            (path := _frame_info.filepath) and
-            (custom_print := deflector.check_path(path))
+            (self._config.dedup or self._config.rate_limit) and
+            self._is_throttled(_frame_info, args)
         ):
-            custom_print(*args, **kwargs)
+            return
+        if self._capture and self._capture_message(_frame_info, args, kwargs):
             return
         
         msg, flush_scheme = self._build_message(_frame_info, *args)
         if msg is _NoMessage: return
         is_raw = isinstance(msg, _RawArgs)
         
-        if self._control['stash_outputs']:
-            self._message_queue.append((msg, is_raw, kwargs))
-        else:
-            self._print(msg, _is_raw=is_raw, **kwargs)
+        if self._stash_depth and self._stash_message(msg, is_raw, kwargs):
+            return
+        self._print(msg, _is_raw=is_raw, **kwargs)
     
     def _print(
         self, msg: T.ComposedMessage, _is_raw: bool = False, **kwargs
@@ -113,17 +216,316 @@ class MainThreadLogger:
     
     @staticmethod
     def _cprint(msg: T.ComposedMessage, **kwargs) -> None:
+        if isinstance(msg, PlainMessage):
+            console.write_plain(
+                msg.text, kwargs.get('end', '\n'), kwargs.get('flush', False)
+            )
+            return
         if isinstance(msg, MessageStruct):
             msg = msg.text
         con_print(msg, **kwargs)
     
     @staticmethod
     def _dprint(msg: T.ComposedMessage) -> None:
+        record = None
         if isinstance(msg, MessageStruct):
+            record = msg.record
             msg = msg.body.plain
+        elif isinstance(msg, PlainMessage):
+            record = msg.record
+            msg = msg.body
+        if record:
+            sink_manager.emit(record, msg)
         for p in printer_manager.printers:
             p(msg)
     
+    # -------------------------------------------------------------------------
+    # stash
+    
+    replay_chunk_size = 4096
+    #   how many stashed messages are rendered into one write on replay.
+    
+    def _push_stash(self) -> None:
+        """
+        hold all messages until the outermost `_pop_stash`. stashes can be -
+        nested, only the outermost one replays. see `.control.delay`.
+        """
+        with self._stash_lock:
+            self._stash_depth += 1
+    
+    def _pop_stash(self) -> None:
+        with self._stash_lock:
+            self._stash_depth -= 1
+            if self._stash_depth or not self._stash:
+                return
+            items, self._stash = self._stash, deque()
+        self._replay(items)
+    
+    def _stash_message(
+        self, msg: T.ComposedMessage, is_raw: bool, kwargs: dict
+    ) -> bool:
+        """
+        returns: False if the stash has just been popped, the caller should -
+            print the message as usual.
+        note: the lock is only taken while stashing, and it is uncontended -
+            unless other threads are printing at the same time.
+        """
+        item = (msg.args, kwargs, std_print) if is_raw else (msg, kwargs, None)
+        with self._stash_lock:
+            if not self._stash_depth:
+                return False
+            self._stash.append(item)
+        return True
+    
+    def _replay(self, items: t.Deque[T.QueueItem]) -> None:
+        """
+        print stashed messages in order, each chunk in one write.
+        flush marks in the stash are not applied again, the replay itself -
+        is a flush.
+        """
+        size = self.replay_chunk_size
+        while items:
+            self._print_batch(
+                [items.popleft() for _ in range(min(size, len(items)))]
+            )
+    
+    def _print_batch(self, batch: t.List[T.QueueItem]) -> None:
+        """
+        render consecutive console messages into one buffer, and write it to -
+        terminal in one call.
+        raw messages (builtin print) break the batch into several runs, to -
+        keep the original order.
+        """
+        run = []
+        
+        def flush_run() -> None:
+            with console:  # enter buffer, write once on exit.
+                segments = []
+                for msg, kwargs in run:
+                    if isinstance(msg, PlainMessage):
+                        segments.append(
+                            Segment(msg.text + kwargs.get('end', '\n'))
+                        )
+                    elif (
+                        isinstance(msg, MessageStruct) and
+                        kwargs.keys() <= {'end', 'flush', 'file'} and
+                        kwargs.get('end', '\n') == '\n' and
+                        isinstance(text := msg.text, Text)
+                    ):
+                        # plain lines are rendered to segments directly, -
+                        # which skips the per-call overhead of -
+                        # `console.print`.
+                        #   note: control chars like '\r' are stripped by -
+                        #   `Text`, so only '\n' ended lines go this way.
+                        segments.extend(text.render(console, '\n'))
+                    else:
+                        if segments:
+                            con_print(Segments(segments), end='')
+                            segments = []
+                        self._cprint(msg, **kwargs)
+                if segments:
+                    con_print(Segments(segments), end='')
+            for msg, _ in run:
+                self._dprint(msg)
+            run.clear()
+        
+        for msg, kwargs, custom_print in batch:
+            if custom_print:
+                if run: flush_run()
+                kwargs.pop('file', None)
+                custom_print(*msg, **kwargs)
+            else:
+                run.append((msg, kwargs))
+        if run: flush_run()
+    
+    # -------------------------------------------------------------------------
+    
+    @staticmethod
+    def _is_below_min_verbosity(args: T.Args, threshold: int) -> bool:
+        """
+        check the verbosity of the markup against `LoggingConfig -
+        .min_verbosity` (or the one set for the caller's path, see -
+        `.deflector.Deflector.route`), before the frame info is built. the -
+        markup is found the same way as `_separate_markup_from_arguments`, -
+        and a known one costs only a dict lookup.
+        """
+        compiled = None
+        if args and isinstance(x := args[0], str):
+            compiled = _compiled_markups.get(x) or _get_compiled(x)
+        if (
+            compiled is None and
+            len(args) > 1 and
+            isinstance(x := args[-1], str)
+        ):
+            compiled = _compiled_markups.get(x) or _get_compiled(x)
+        if compiled is None or compiled.verbosity is None:
+            return False
+        return compiled.verbosity < threshold
+    
+    def _is_sampled(self, frame_info: T.FrameInfo, args: T.Args) -> bool:
+        """
+        check `LoggingConfig.sampling` and `.sampling_markups`. only the -
+        call site key and the markup candidates are looked at.
+        """
+        rate = self._config.sampling
+        if markups := self._config.sampling_markups:
+            if args and isinstance(args[0], str) and args[0] in markups:
+                rate = markups[args[0]]
+            elif (
+                len(args) > 1 and
+                isinstance(args[-1], str) and
+                args[-1] in markups
+            ):
+                rate = markups[args[-1]]
+        if not rate or rate == 1:
+            return True
+        
+        stats = self._sampling
+        with self._state_lock:
+            stats['total'] += 1
+            if rate > 1:
+                counts = stats['counts']
+                key = frame_info.call_site
+                n = counts.get(key, 0)
+                counts[key] = n + 1
+                keep = n % int(rate) == 0
+            else:
+                keep = random() < rate
+            if keep:
+                stats['kept'] += 1
+        return keep
+    
+    def _report_at_exit(self) -> None:
+        self._report_throttled()
+        if total := self._sampling['total']:
+            kept = self._sampling['kept']
+            # stop sampling, or the report itself may be dropped.
+            self._config.update(sampling=0, sampling_markups=None)
+            print(
+                ':rs1',
+                f'[dim]lk-logger: process exit '
+                f'(sampled {kept:,} of {total:,} messages)[/]'
+            )
+    
+    def _is_throttled(self, frame_info: T.FrameInfo, args: T.Args) -> bool:
+        """
+        check `LoggingConfig.dedup` and `.rate_limit` for the call site.
+        the dropped messages are reported by `_report_throttled`.
+        """
+        now = perf_counter()
+        frame_id = frame_info.id
+        with self._state_lock:
+            if (last := self._last_throttled) and last != frame_id:
+                # the flood at another call site is over, report it before -
+                # the new message.
+                self._last_throttled = None
+                self._report_throttled(
+                    last, self._cache.get_throttle(last), now
+                )
+            state = self._cache.get_throttle(frame_id)
+            
+            if self._config.dedup:
+                key = args if all(
+                    type(x) in _dedup_types for x in args
+                ) else None
+                if key is not None and key == state['key']:
+                    state['repeats'] += 1
+                    if now - state['repeat_start'] >= _throttle_window:
+                        # a long flood is reported periodically.
+                        self._report_throttled(frame_id, state, now)
+                    self._last_throttled = frame_id
+                    return True
+                if state['repeats']:
+                    self._report_throttled(frame_id, state, now)
+                state['key'] = key
+                state['repeat_start'] = now
+            
+            if limit := self._config.rate_limit:
+                if now - state['window_start'] >= _throttle_window:
+                    if state['suppressed']:
+                        self._report_throttled(frame_id, state, now)
+                    state['window_start'] = now
+                    state['window_count'] = 0
+                if state['window_count'] >= limit:
+                    state['suppressed'] += 1
+                    self._last_throttled = frame_id
+                    return True
+                state['window_count'] += 1
+            
+            return False
+    
+    def _report_throttled(
+        self,
+        frame_id: str = None,
+        state: T.Throttle = None,
+        now: float = None,
+    ) -> None:
+        """
+        print and reset the counts of dropped messages of a call site, or of -
+        all call sites if `frame_id` is not given (e.g. at exit).
+        the summary line shares the head of the call site's messages.
+        """
+        if frame_id is None:
+            now = perf_counter()
+            with self._state_lock:
+                for frame_id, state in self._cache.iter_throttles():
+                    self._report_throttled(frame_id, state, now)
+            return
+        
+        notes = []
+        if state['repeats']:
+            notes.append('repeated {:,} times in {:.1f}s'.format(
+                state['repeats'], now - state['repeat_start']
+            ))
+            state['repeats'] = 0
+            state['repeat_start'] = now
+        if state['suppressed']:
+            notes.append('suppressed {:,} messages in {:.1f}s'.format(
+                state['suppressed'], now - state['window_start']
+            ))
+            state['suppressed'] = 0
+        if not notes:
+            return
+        
+        if info := self._cache.get_any_info(frame_id):
+            show_source = self._config.show_source
+            show_funcname = self._config.show_funcname
+        else:  # the call site has never been printed with a head.
+            info = {
+                'file_path'      : '',
+                'line_number'    : '0',
+                'is_external_lib': False,
+                'function_name'  : '',
+                'variable_names' : (),
+            }
+            show_source = show_funcname = False
+        self._print(msg_builder.compose(
+            ('[dim]({})[/]'.format(', '.join(notes)),),
+            {MarkMeaning.RICH_FORMAT: True},
+            info,
+            show_source=show_source,
+            show_funcname=show_funcname,
+            sourcemap_alignment=self._config.sourcemap_alignment,
+        ))
+    
+    def _capture_message(
+        self, frame_info: T.FrameInfo, args: T.Args, kwargs: dict
+    ) -> bool:
+        """
+        returns: False if the message is not captured, see `.capture -
+            .CaptureWriter.write`.
+        """
+        markup = self._separate_markup_from_arguments(frame_info.id, args)[2]
+        if (
+            (offset := self._local.caller_layer_offset) and
+            markup_analyzer.compile(markup).parent_layer >= 0
+        ):
+            # the same frame as `_build_message` resolves with ':p'. the -
+            # renderer applies the ':p' part again on the captured frame.
+            if x := frame_info.get_parent(offset):
+                frame_info = x
+        return self._capture.write(frame_info, args, markup, kwargs)
+    
     # FIXME
     def fmt(self, _frame_info: FrameInfo = None, *args, **_) -> str:
         return str(self._build_message(
@@ -137,59 +539,48 @@ class MainThreadLogger:
     ) -> t.Tuple[T.ComposedMessage, T.FlushScheme]:
         args, markup_pos, markup = \
             self._separate_markup_from_arguments(frame_info.id, args)
-        marks = markup_analyzer.extract(markup)
-        if 'p' in marks:
-            if self._control['caller_layer_offset']:
-                marks['p'] += self._control['caller_layer_offset']
+        compiled = markup_analyzer.compile(markup)
+        parent_layer = compiled.parent_layer  # -1 if ':p' is absent.
+        if parent_layer >= 0:
+            parent_layer += self._local.caller_layer_offset
         
         get_varnames = frame_info.collect_varnames  # backup method pointer
-        if marks['p']: frame_info = frame_info.get_parent(marks['p'])
-        marks_meaning = markup_analyzer.analyze(marks, frame_info=frame_info)
-        del marks
+        if parent_layer > 0:
+            frame_info = frame_info.get_parent(parent_layer)
+        marks_meaning = markup_analyzer.evaluate(
+            compiled, frame_info=frame_info, parent_layer=parent_layer
+        )
         
-        flush_scheme: T.FlushScheme
-        if MarkMeaning.FLUSH in marks_meaning:
-            flush_scheme = 1
-        elif MarkMeaning.FLUSH_CUTOFF in marks_meaning:
-            flush_scheme = 2
-        elif MarkMeaning.FLUSH_EDDY in marks_meaning:
-            flush_scheme = 3
-        else:
-            flush_scheme = 0
+        flush_scheme = compiled.flush_scheme
+        moderate_prune = compiled.moderate_prune
+        agressive_prune = compiled.agressive_prune
+        plain = compiled.plain
         
         # check cache
         if self._cache.is_cached(frame_info.id, markup):
             cached_info = self._cache.get_cache(frame_info.id, markup)
-            return msg_builder.compose(
-                args, marks_meaning, cached_info,
+            return self._compose(
+                args, marks_meaning, cached_info, plain, frame_info.filepath,
                 show_source=(
-                    self._config.show_source and
-                    MarkMeaning.AGRESSIVE_PRUNE not in marks_meaning
+                    self._config.show_source and not agressive_prune
                 ),
                 show_funcname=(
-                    self._config.show_funcname and
-                    MarkMeaning.AGRESSIVE_PRUNE not in marks_meaning
+                    self._config.show_funcname and not agressive_prune
                 ),
                 show_varnames=(
                     self._config.show_varnames and
-                    MarkMeaning.MODERATE_PRUNE not in marks_meaning and
-                    MarkMeaning.AGRESSIVE_PRUNE not in marks_meaning
+                    not moderate_prune and not agressive_prune
                 ),
                 show_verbosity_tag=(
                     self._config.show_verbosity_tag and
-                    MarkMeaning.MODERATE_PRUNE not in marks_meaning and
-                    MarkMeaning.AGRESSIVE_PRUNE not in marks_meaning
+                    not moderate_prune and not agressive_prune
                 ),
-                sourcemap_alignment=self._config.sourcemap_alignment,
             ), flush_scheme
         
         # ---------------------------------------------------------------------
         
         if not args:
-            if (
-                MarkMeaning.MODERATE_PRUNE in marks_meaning or
-                MarkMeaning.AGRESSIVE_PRUNE in marks_meaning
-            ):
+            if moderate_prune or agressive_prune:
                 return _NoMessage, flush_scheme
         if (
             MarkMeaning.RICH_OBJECT in marks_meaning or
@@ -233,23 +624,15 @@ class MainThreadLogger:
             'variable_names' : (),
         }
         
-        show_source = (
-            self._config.show_source and
-            MarkMeaning.AGRESSIVE_PRUNE not in marks_meaning
-        )
-        show_funcname = (
-            self._config.show_funcname and
-            MarkMeaning.AGRESSIVE_PRUNE not in marks_meaning
-        )
+        show_source = self._config.show_source and not agressive_prune
+        show_funcname = self._config.show_funcname and not agressive_prune
         show_varnames = (
             self._config.show_varnames and
-            MarkMeaning.MODERATE_PRUNE not in marks_meaning and
-            MarkMeaning.AGRESSIVE_PRUNE not in marks_meaning
+            not moderate_prune and not agressive_prune
         )
         show_verbosity_tag = (
             self._config.show_verbosity_tag and
-            MarkMeaning.MODERATE_PRUNE not in marks_meaning and
-            MarkMeaning.AGRESSIVE_PRUNE not in marks_meaning
+            not moderate_prune and not agressive_prune
         )
         
         if any((show_source, show_funcname, show_varnames)):
@@ -280,17 +663,58 @@ class MainThreadLogger:
         
         self._cache.store_info(frame_info.id, markup, info)
         
-        return msg_builder.compose(
+        return self._compose(
             args,
             marks_meaning,
             info,
+            plain,
+            frame_info.filepath,
             show_source=show_source,
             show_funcname=show_funcname,
             show_varnames=show_varnames,
             show_verbosity_tag=show_verbosity_tag,
-            sourcemap_alignment=self._config.sourcemap_alignment,
         ), flush_scheme
     
+    def _compose(
+        self,
+        args: T.Args,
+        marks_meaning: T.MarksMeaning,
+        info: T.Info,
+        plain: bool,
+        filepath: str,
+        **kwargs
+    ) -> t.Union[MessageStruct, PlainMessage]:
+        """
+        use the plain text fast path if nothing styled would be rendered, -
+        for example when stdout is redirected to a file.
+        
+        params:
+            filepath: the caller's file, for file sinks. see `.file_sink -
+                .T.Record`.
+        """
+        if (
+            plain and
+            self._config.sourcemap_alignment == 'left' and
+            console.is_plain
+        ):
+            msg = msg_builder.compose_plain(
+                args, marks_meaning, info, **kwargs
+            )
+        else:
+            msg = msg_builder.compose(
+                args, marks_meaning, info,
+                sourcemap_alignment=self._config.sourcemap_alignment,
+                **kwargs
+            )
+        if sink_manager.sinks:
+            # stamp the time here, the message may be written later by the -
+            # background thread.
+            msg.record = (
+                time(), info, marks_meaning.get(MarkMeaning.VERBOSITY),
+                filepath
+            )
+        return msg
+    
     def _separate_markup_from_arguments(
         self, frame_id: str, args: T.Args
     ) -> t.Tuple[T.Args, T.MarkupPos, T.Markup]:
@@ -327,55 +751,295 @@ class MainThreadLogger:
 
 
 class SubThreadLogger(MainThreadLogger):
+    _overflow_sample_step = 10  # see `LoggingConfig.queue_overflow`.
+    
     def __init__(self) -> None:
         super().__init__()
         self._config.subthreaded = True
-        self._running = False
+        self._running = True
         self._message_queue = deque()
+        # `_busy` is True while the consumer is printing a message that has -
+        # already been popped from the queue, so "queue is empty" alone does -
+        # not mean "everything has been printed".
+        self._busy = False
+        self._buffers = []  # see `_enqueue_nowait`.
+        self._dropped_count = 0
+        self._overflow_count = 0  # for 'sample' policy.
+        self._lock = Lock()
+        self._sequence = count()
+        # True while the consumer may be waiting for work, so the producers -
+        # of `_enqueue_nowait` must wake it up.
+        self._waiting = False
+        self._has_work = Condition(self._lock)
+        self._has_room = Condition(self._lock)
+        self._drained = Condition(self._lock)
         atexit.register(self._stop_running)
         self._thread = Thread(target=self._start_running)
         self._thread.daemon = True
         self._thread.start()
     
     def _start_running(self) -> None:
-        self._running = True
-        while self._running:
-            if self._control['stash_outputs']:
-                sleep(1e-3)
-                continue
-            if self._message_queue:
-                msg, kwargs, custom_print = self._message_queue.popleft()
-                if custom_print:
-                    # dprint(custom_print, msg, kwargs)
-                    kwargs.pop('file', None)
-                    custom_print(*msg, **kwargs)
+        while True:
+            with self._lock:
+                self._waiting = True
+                while True:
+                    if not self._message_queue:
+                        self._merge_buffers()
+                    if not self._running or self._message_queue:
+                        break
+                    self._has_work.wait()
+                if not self._message_queue:  # stopped and nothing left
+                    self._drained.notify_all()
+                    return
+                batch = self._pop_batch()
+                self._waiting = False
+                self._busy = True
+                self._has_room.notify_all()
+            try:
+                if len(batch) == 1:
+                    msg, kwargs, custom_print = batch[0]
+                    if custom_print:
+                        # dprint(custom_print, msg, kwargs)
+                        kwargs.pop('file', None)
+                        custom_print(*msg, **kwargs)
+                    else:
+                        self._cprint(msg, **kwargs)
+                        self._dprint(msg)
                 else:
-                    self._cprint(msg, **kwargs)
-                    self._dprint(msg)
-            else:
-                sleep(1e-3)
+                    self._print_batch(batch)
+            finally:
+                with self._lock:
+                    idle = not self._message_queue
+                if idle and sink_manager.sinks:
+                    # write the records of this burst in one call.
+                    sink_manager.flush_all()
+                with self._lock:
+                    self._busy = False
+                    if not self._message_queue:
+                        self._drained.notify_all()
+    
+    def _pop_batch(self) -> t.List[T.QueueItem]:
+        """
+        note: must be called with `self._lock` held.
+        """
+        size = self._config.batch_size
+        if size <= 1:
+            return [self._message_queue.popleft()]
+        
+        out = []
+        deadline = perf_counter() + self._config.batch_timeout
+        while len(out) < size:
+            if self._message_queue:
+                out.append(self._message_queue.popleft())
+                continue
+            if self._merge_buffers():
+                continue
+            if not self._running:
+                break
+            if (remaining := deadline - perf_counter()) <= 0:
+                break
+            self._has_work.wait(remaining)
+        return out
     
     def _stop_running(self) -> None:
+        self._report_throttled()
         if self._config.clear_unfinished_stream:
-            skipped_count = len(self._message_queue)
-            if skipped_count:
+            with self._lock:
+                self._merge_buffers()
+                skipped_count = len(self._message_queue)
                 self._message_queue.clear()
+                self._has_room.notify_all()
         else:
-            while self._message_queue:
-                sleep(1e-3)
+            self._wait_drained()
             skipped_count = 0
-            
-        self._running = False
+        
+        with self._lock:
+            self._running = False
+            self._has_work.notify()
+            self._has_room.notify_all()
         self._thread.join()
         
         # dbg_print(skipped_count)
+        dropped_count = self._take_dropped_count()
+        # the consumer thread is gone, later messages (including the -
+        # reports below, and the ones from `_report_at_exit`) are printed -
+        # directly.
+        self._config.subthreaded = False
         if skipped_count:
-            self._config.subthreaded = False
             print(
                 ':frs1',
                 f'[dim]lk-logger: process exit '
                 f'[red](... skipped {skipped_count} messages)[/][/]'
             )
+        if dropped_count:
+            print(
+                ':frs1',
+                f'[dim]lk-logger: process exit '
+                f'[red](... dropped {dropped_count} messages because of '
+                f'queue overflow)[/][/]'
+            )
+    
+    def _enqueue(self, item: T.QueueItem) -> None:
+        if self._config.multithread and self._config.queue_size <= 0:
+            self._enqueue_nowait(item)
+            return
+        with self._lock:
+            size = self._config.queue_size
+            if size > 0 and len(self._message_queue) >= size:
+                policy = self._config.queue_overflow
+                if policy == 'block':
+                    # do not block if the consumer cannot make progress, -
+                    # otherwise it will be a deadlock.
+                    if (
+                        self._thread.is_alive() and
+                        current_thread() is not self._thread
+                    ):
+                        while (
+                            len(self._message_queue) >= size and
+                            self._running
+                        ):
+                            self._has_room.wait()
+                elif policy == 'drop_newest':
+                    self._dropped_count += 1
+                    return
+                elif policy == 'drop_oldest':
+                    self._message_queue.popleft()
+                    self._dropped_count += 1
+                elif policy == 'sample':
+                    self._overflow_count += 1
+                    self._dropped_count += 1
+                    if self._overflow_count % self._overflow_sample_step:
+                        return
+                    self._message_queue.popleft()
+                else:
+                    raise ValueError(policy)
+            self._message_queue.append(item)
+            self._has_work.notify()
+    
+    def _enqueue_nowait(self, item: T.QueueItem) -> None:
+        """
+        append to the buffer of the calling thread, without taking the lock -
+        (unless the consumer is idle and needs to be woken up). the consumer -
+        merges all buffers by sequence numbers, see `_merge_buffers`.
+        see also `LoggingConfig.multithread`.
+        """
+        if (buffer := self._local.buffer) is None:
+            buffer = self._local.buffer = deque()
+            with self._lock:
+                self._buffers.append((current_thread(), buffer))
+        # `next(count)` and `deque.append` are atomic.
+        buffer.append((next(self._sequence), item))
+        if self._waiting:
+            # the consumer sets `_waiting` before it checks the buffers, so -
+            # either it sees this item, or we see the flag.
+            with self._lock:
+                self._has_work.notify()
+    
+    def _merge_buffers(self) -> bool:
+        """
+        move items from the per-thread buffers to the message queue, in the -
+        order they were logged across threads.
+        returns: whether anything was moved.
+        note: must be called with `self._lock` held.
+        """
+        if not self._buffers:
+            return False
+        # take only the items logged before the watermark. the buffers are -
+        # visited one by one, an item appended to a visited buffer meanwhile -
+        # may have a smaller sequence number than the ones found later, so -
+        # it must wait for the next merge.
+        mark = next(self._sequence)
+        runs = []
+        buffers = []
+        for thread, buffer in self._buffers:
+            run = []
+            while buffer and buffer[0][0] < mark:
+                run.append(buffer.popleft())
+            if run:
+                runs.append(run)
+            if buffer or thread.is_alive():
+                buffers.append((thread, buffer))
+        self._buffers = buffers
+        if not runs:
+            return False
+        if len(runs) == 1:
+            self._message_queue.extend(x[1] for x in runs[0])
+        else:
+            # each run is already sorted, which makes the sort a merge.
+            self._message_queue.extend(
+                x[1] for x in sorted(chain(*runs), key=itemgetter(0))
+            )
+        return True
+    
+    def _push_stash(self) -> None:
+        if not self._stash_depth and self._config.subthreaded:
+            # print the queued ones before holding the new ones.
+            self._wait_drained()
+        super()._push_stash()
+    
+    def _replay(self, items: t.Deque[T.QueueItem]) -> None:
+        """
+        hand the stashed messages to the consumer in chunks. the queue size -
+        limit doesn't apply, nothing is dropped.
+        """
+        if not self._config.subthreaded or not self._thread.is_alive():
+            super()._replay(items)
+            return
+        size = self.replay_chunk_size
+        with self._lock:
+            self._merge_buffers()  # the older ones go first.
+            while items:
+                chunk = [items.popleft() for _ in range(min(size, len(items)))]
+                self._message_queue.append(((chunk,), {}, self._print_batch))
+            self._has_work.notify()
+    
+    def _take_dropped_count(self) -> int:
+        with self._lock:
+            out, self._dropped_count = self._dropped_count, 0
+            self._overflow_count = 0
+        return out
+    
+    def _wait_drained(self) -> None:
+        """
+        block until the consumer has printed everything queued so far.
+        note: stashed messages (see `_push_stash`) are not in the queue, -
+        they are not waited for.
+        """
+        if not self._thread.is_alive() or current_thread() is self._thread:
+            return
+        with self._lock:
+            self._merge_buffers()
+            self._has_work.notify()
+            while (self._message_queue or self._busy) and self._running:
+                self._drained.wait()
+    
+    def _flush(self, scheme: T.FlushScheme, _caller_layer: int = 2) -> None:
+        """
+        params:
+            _caller_layer: how many layers from `_flush` to user's frame, -
+                used to attribute the notices to the right source.
+        """
+        if scheme == 1:
+            self._wait_drained()
+        elif scheme == 2:
+            with self._lock:
+                self._merge_buffers()
+                skipped_count = len(self._message_queue)
+                self._message_queue.clear()
+                self._has_room.notify_all()
+            if skipped_count:
+                self._wait_drained()  # the one under printing, if exists.
+                print(
+                    f':fv7p{_caller_layer}',
+                    f'(... skipped {skipped_count} messages)'
+                )
+        else:  # 0 or 3, not handled here, just return.
+            return
+        if dropped_count := self._take_dropped_count():
+            print(
+                f':fv7p{_caller_layer}',
+                f'(... dropped {dropped_count} messages)'
+            )
     
     # -------------------------------------------------------------------------
     
@@ -383,42 +1047,60 @@ class SubThreadLogger(MainThreadLogger):
         self, *args: t.Any, _frame_info: T.FrameInfo = None, **kwargs
     ) -> None:
         if _frame_info is None:
-            _frame_info = FrameInfo(currentframe().f_back)
-        # dbg_print(_frame_info, bool(pipeline.get(_frame_info.filepath)))
+            # `sys._getframe` is much cheaper than `inspect.currentframe`.
+            frame = sys._getframe(1)
+            if (route := _routes.get(id(frame.f_code))) is None:
+                route = deflector.route(frame)
+            custom_print, min_verbosity = route
+            if custom_print:
+                if custom_print is not non_print:  # muted, skip the call.
+                    custom_print(*args, **kwargs)
+                return
+            if min_verbosity is None:
+                min_verbosity = self._config.min_verbosity
+            if min_verbosity and self._is_below_min_verbosity(
+                args, min_verbosity
+            ):
+                return
+            _frame_info = FrameInfo(frame)
+        else:
+            if (path := _frame_info.filepath) and (
+                custom_print := deflector.check_path(path)
+            ):
+                custom_print(*args, **kwargs)
+                return
+            if (min_verbosity := deflector.get_min_verbosity(path)) is None:
+                min_verbosity = self._config.min_verbosity
+            if min_verbosity and self._is_below_min_verbosity(
+                args, min_verbosity
+            ):
+                return
+        if (
+            (self._config.sampling or self._config.sampling_markups) and
+            not self._is_sampled(_frame_info, args)
+        ):
+            return
         
         if (
-            (path := _frame_info.filepath) and
-            (custom_print := deflector.check_path(path))
+            (self._config.dedup or self._config.rate_limit) and
+            self._is_throttled(_frame_info, args)
         ):
-            custom_print(*args, **kwargs)
+            return
+        if self._capture and self._capture_message(_frame_info, args, kwargs):
             return
         
         msg, flush_scheme = self._build_message(_frame_info, *args)
         # dbg_print(flush_scheme)
         
         if msg is _NoMessage:
-            if flush_scheme == 1:
-                while self._message_queue:
-                    sleep(1e-3)
-            elif flush_scheme == 2:
-                if skipped_count := len(self._message_queue):
-                    self._message_queue.clear()
-                    print(':fv7p2', f'(... skipped {skipped_count} messages)')
+            self._flush(flush_scheme)
             return
         
         is_raw = isinstance(msg, _RawArgs)
+        if self._stash_depth and self._stash_message(msg, is_raw, kwargs):
+            return
         self._print(msg, flush_scheme, _is_raw=is_raw, **kwargs)
     
-    # def _flush(self, scheme: int) -> None:
-    #     if scheme == 1:
-    #         while self._message_queue:
-    #             sleep(1e-3)
-    #     elif scheme == 2:
-    #         if skipped_count := len(self._message_queue):
-    #             self._message_queue.clear()
-    #             print(':fv7p2', f'(... skipped {skipped_count} messages)')
-    #     # else: 0 or 3, not handled here, just return.
-    
     def _print(
         self,
         msg: T.ComposedMessage,
@@ -429,9 +1111,9 @@ class SubThreadLogger(MainThreadLogger):
         if flush_scheme == 0:
             if self._config.subthreaded:
                 if _is_raw:
-                    self._message_queue.append((msg.args, kwargs, std_print))
+                    self._enqueue((msg.args, kwargs, std_print))
                 else:
-                    self._message_queue.append((msg, kwargs, None))
+                    self._enqueue((msg, kwargs, None))
             else:
                 if _is_raw:
                     self._bprint(msg, **kwargs)
@@ -439,17 +1121,14 @@ class SubThreadLogger(MainThreadLogger):
                     self._cprint(msg, **kwargs)
                     self._dprint(msg)
         elif flush_scheme == 1:
-            while self._message_queue:
-                sleep(1e-3)
+            self._flush(1, _caller_layer=3)
             if _is_raw:
                 self._bprint(msg, **kwargs)
             else:
                 self._cprint(msg, **kwargs)
                 self._dprint(msg)
         elif flush_scheme == 2:
-            if skipped_count := len(self._message_queue):
-                self._message_queue.clear()
-                print(':fv7p2', f'(... skipped {skipped_count} messages)')
+            self._flush(2, _caller_layer=3)
             if _is_raw:
                 self._bprint(msg, **kwargs)
             else:
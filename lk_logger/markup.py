@@ -1,11 +1,14 @@
 import typing as t
+from collections import OrderedDict
 from collections import defaultdict
 from enum import Enum
 from enum import auto
 from random import choices
 from re import compile as re_compile
 from string import ascii_lowercase
+from threading import Lock
 from time import time
+from types import MappingProxyType
 
 from .printer import dbg_print  # noqa
 
@@ -40,6 +43,18 @@ class MarkMeaning(Enum):
     VERBOSITY = auto()
 
 
+# the meanings supported by `.message_builder.MessageBuilder.compose_plain`.
+plain_meanings = frozenset((
+    MarkMeaning.AGRESSIVE_PRUNE,
+    MarkMeaning.FLUSH,
+    MarkMeaning.FLUSH_CUTOFF,
+    MarkMeaning.FLUSH_EDDY,
+    MarkMeaning.MODERATE_PRUNE,
+    MarkMeaning.PARENT_POINTER,
+    MarkMeaning.VERBOSITY,
+))
+
+
 class T:
     Markup = str
     Marks = t.TypedDict('Marks', {
@@ -63,7 +78,15 @@ class T:
         Index = int
         UniqueId = str
         
+        # noinspection PyTypedDict
+        Scope = t.TypedDict('Scope', {
+            'last_indent': Indent,
+            'levels'     : t.Dict[Indent, UniqueId],
+        })
+        ScopeKey = t.Tuple[t.Optional[FrameId], str, str]
+        #   (parent frame id, filepath, funcname)
         ScopedIndexes = t.DefaultDict[UniqueId, Index]
+        Scopes = t.OrderedDict[ScopeKey, Scope]
         Uid2ColorHex = t.DefaultDict[UniqueId, ColorHex]
         UidGenerator = t.DefaultDict[str, UniqueId]
 
@@ -77,14 +100,18 @@ class MarkupAnalyzer:
     """
     readme: prj:/docs/markup.zh.md
     """
+    _compiled: t.Dict[T.Markup, 'CompiledMarkup']
     _counter: '_Counter'
+    _dynamic_levels = {'i': (0, 1, 2, 3), 't': (0, 1, 2)}
     _levels: t.Tuple[str, ...]
     _mark_pattern_0 = re_compile(r'^:(?:[defilprstv][0-9]?)+$')
     _mark_pattern_1 = re_compile(r'\w\d?')
+    _max_compiled = 1024
     _simple_time: float
     _temp_time: float
     
     def __init__(self) -> None:
+        self._compiled = {}
         self._counter = _Counter()
         self._simple_time = time()
         self._temp_time = time()
@@ -92,6 +119,17 @@ class MarkupAnalyzer:
     def is_valid_markup(self, text: str) -> bool:
         return bool(self._mark_pattern_0.match(text))
     
+    def get_compiled(self, text: str) -> t.Optional['CompiledMarkup']:
+        """
+        the same as `compile`, but returns None if `text` is not a markup. -
+        a known markup costs only a dict lookup.
+        """
+        if (x := self._compiled.get(text)) is not None:
+            return x
+        if text.startswith(':') and self.is_valid_markup(text):
+            return self.compile(text)
+        return None
+    
     def extract(self, markup: T.Markup) -> T.Marks:
         """
         description: (the asterisk symbol on the left means default entry)
@@ -165,6 +203,74 @@ class MarkupAnalyzer:
         return out
     
     def analyze(self, marks: T.Marks, **kwargs) -> T.MarksMeaning:
+        out = self._analyze_static(marks)
+        self._analyze_dynamic(marks, out, kwargs.get('frame_info'))
+        return out
+    
+    def compile(self, markup: T.Markup) -> 'CompiledMarkup':
+        """
+        extract and analyze the static part of markup, memoized by markup -
+        string. use `evaluate` to get the final meanings per call.
+        """
+        if (x := self._compiled.get(markup)) is None:
+            if len(self._compiled) >= self._max_compiled:
+                # markups are usually literals, this only happens when -
+                # they are generated dynamically.
+                self._compiled.clear()
+            marks = self.extract(markup)
+            static = self._analyze_static(marks)
+            dynamic = tuple(
+                (k, marks[k]) for k, levels in self._dynamic_levels.items()
+                if k in marks and marks[k] in levels
+            )
+            if MarkMeaning.FLUSH in static:
+                flush_scheme = 1
+            elif MarkMeaning.FLUSH_CUTOFF in static:
+                flush_scheme = 2
+            elif MarkMeaning.FLUSH_EDDY in static:
+                flush_scheme = 3
+            else:
+                flush_scheme = 0
+            x = self._compiled[markup] = CompiledMarkup(
+                markup,
+                marks['p'],
+                MappingProxyType(static),
+                dynamic,
+                static.get(MarkMeaning.VERBOSITY),
+                flush_scheme,
+                MarkMeaning.MODERATE_PRUNE in static,
+                MarkMeaning.AGRESSIVE_PRUNE in static,
+                not dynamic and plain_meanings.issuperset(static),
+            )
+        return x
+    
+    def evaluate(
+        self,
+        compiled: 'CompiledMarkup',
+        frame_info: 'FrameInfo' = None,
+        parent_layer: int = None,
+    ) -> T.MarksMeaning:
+        """
+        params:
+            parent_layer: optional. overrides `compiled.parent_layer`.
+        returns: the static meanings as is if nothing is dynamic. do not -
+            modify it.
+        """
+        if not compiled.dynamic_marks and (
+            parent_layer is None or parent_layer == compiled.parent_layer
+        ):
+            return compiled.static_meaning
+        out = dict(compiled.static_meaning)
+        if parent_layer is not None:
+            out[MarkMeaning.PARENT_POINTER] = max(parent_layer, 0)
+        if compiled.dynamic_marks:
+            self._analyze_dynamic(
+                defaultdict(lambda: -1, compiled.dynamic_marks),
+                out, frame_info
+            )
+        return out
+    
+    def _analyze_static(self, marks: T.Marks) -> T.MarksMeaning:
         out = {}
         
         if marks['d'] >= 0:
@@ -194,19 +300,9 @@ class MarkupAnalyzer:
         
         if marks['i'] >= 0:
             if marks['i'] == 0:
-                self._counter.reset_all_indexes()
                 out[MarkMeaning.RICH_FORMAT] = True
                 out[MarkMeaning.RESET_INDEX] = 0
-            elif marks['i'] == 1:
-                out[MarkMeaning.SWIFT_INDEX] = \
-                    self._counter.update_scoped_index(kwargs['frame_info'])
-            elif marks['i'] == 2:
-                out[MarkMeaning.LINE_INDEX] = \
-                    self._counter.update_line_index(kwargs['frame_info'])
-            elif marks['i'] == 3:
-                out[MarkMeaning.GLOBAL_INDEX] = \
-                    self._counter.update_global_index()
-            else:
+            elif marks['i'] > 3:
                 raise E.UnsupportedMarkup(f':i{marks["i"]}')
         
         if marks['l'] >= 0:
@@ -238,45 +334,91 @@ class MarkupAnalyzer:
                 raise E.UnsupportedMarkup(f':s{marks["s"]}')
         
         if marks['t'] >= 0:
-            if marks['t'] == 0:
+            if marks['t'] in (0, 1, 2):
                 out[MarkMeaning.RICH_FORMAT] = True
+            elif marks['t'] == 3:
+                out[MarkMeaning.TABULAR_DATA] = True
+            else:
+                raise E.UnsupportedMarkup(f':t{marks["t"]}')
+        
+        if marks['v'] >= 0:
+            out[MarkMeaning.VERBOSITY] = marks['v']
+        
+        return out
+    
+    def _analyze_dynamic(
+        self,
+        marks: T.Marks,
+        out: T.MarksMeaning,
+        frame_info: 'FrameInfo' = None,
+    ) -> None:
+        """
+        evaluate marks that have side effects or vary from call to call -
+        (counters and timers). see also `_dynamic_levels`.
+        """
+        if marks['i'] >= 0:
+            if marks['i'] == 0:
+                self._counter.reset_all_indexes()
+            elif marks['i'] == 1:
+                out[MarkMeaning.SWIFT_INDEX] = \
+                    self._counter.update_scoped_index(frame_info)
+            elif marks['i'] == 2:
+                out[MarkMeaning.LINE_INDEX] = \
+                    self._counter.update_line_index(frame_info)
+            elif marks['i'] == 3:
+                out[MarkMeaning.GLOBAL_INDEX] = \
+                    self._counter.update_global_index()
+        
+        if marks['t'] >= 0:
+            if marks['t'] == 0:
                 t = self._simple_time = time()
                 out[MarkMeaning.RESET_TIMER] = t
             elif marks['t'] == 1:
-                out[MarkMeaning.RICH_FORMAT] = True
                 start, end = self._simple_time, time()
                 out[MarkMeaning.STOP_TIMER] = (start, end)
                 self._simple_time = end
             elif marks['t'] == 2:
-                out[MarkMeaning.RICH_FORMAT] = True
                 start, end = self._temp_time, time()
                 out[MarkMeaning.TEMP_TIMER] = (start, end)
                 self._temp_time = end
-            elif marks['t'] == 3:
-                out[MarkMeaning.TABULAR_DATA] = True
-            else:
-                raise E.UnsupportedMarkup(f':t{marks["t"]}')
-        
-        if marks['v'] >= 0:
-            out[MarkMeaning.VERBOSITY] = marks['v']
-        
-        return out
+
+
+class CompiledMarkup(t.NamedTuple):
+    markup: T.Markup
+    parent_layer: int  # -1 if ':p' is absent.
+    static_meaning: t.Mapping[MarkMeaning, t.Any]  # read-only.
+    dynamic_marks: t.Tuple[t.Tuple[str, int], ...]  # ((mark, level), ...)
+    # the fields below are derived from `static_meaning`, so that the logger -
+    # doesn't look up `MarkMeaning` keys (whose `__hash__` is slow) per call.
+    verbosity: t.Optional[int]  # None if ':v' is absent.
+    flush_scheme: int  # see `..logger.T.FlushScheme`.
+    moderate_prune: bool
+    agressive_prune: bool
+    plain: bool  # can be composed as plain text, see `plain_meanings`.
 
 
 class _Counter:
+    max_scopes: int = 1024
+    #   scopes are keyed by call sites, not by frame objects (which are not -
+    #   weak-referenceable), so we cannot tell when a scope is finished. -
+    #   instead the least recently used scopes are evicted beyond this limit.
     _global_index: T.Counter.Index
-    _last_indent: T.Counter.Indent
     _last_uid: T.Counter.UniqueId
     _line_indexes: T.Counter.ScopedIndexes
+    _lock: Lock
+    #   indexes are read-modify-written, and scopes are reordered on every -
+    #   call. they are shared by all threads that print.
     _scoped_indexes: T.Counter.ScopedIndexes
+    _scopes: T.Counter.Scopes
     _uid_2_color: T.Counter.Uid2ColorHex
     _uid_gen: T.Counter.UidGenerator
     
     def __init__(self) -> None:
         self._global_index = 0
         self._line_indexes = defaultdict(lambda: 0)
+        self._lock = Lock()
         self._scoped_indexes = defaultdict(lambda: 0)
-        self._last_indent = 0
+        self._scopes = OrderedDict()
         self._last_uid = ''
         self._uid_2_color = defaultdict(self._get_random_bright_color)
         self._uid_gen = defaultdict(self._generate_uid)
@@ -294,47 +436,65 @@ class _Counter:
         return '#' + ''.join(choices('89ABCDEF', k=6))
     
     def update_global_index(self) -> T.Counter.Index:
-        self._global_index += 1
-        return self._global_index
+        with self._lock:
+            self._global_index += 1
+            return self._global_index
     
     def update_line_index(self, frame_info: 'FrameInfo') -> t.Tuple[
         T.Counter.Index, T.Counter.UniqueId, T.Counter.ColorHex
     ]:
-        uid = self._uid_gen[frame_info.id]
-        self._line_indexes[uid] += 1
-        return self._line_indexes[uid], uid, self._uid_2_color[uid]
+        with self._lock:
+            uid = self._uid_gen[frame_info.id]
+            self._line_indexes[uid] += 1
+            return self._line_indexes[uid], uid, self._uid_2_color[uid]
     
     def update_scoped_index(self, frame_info: 'FrameInfo') -> t.Tuple[
         T.Counter.Index, T.Counter.UniqueId, T.Counter.ColorHex
     ]:
-        indent = frame_info.indentation
-        if self._last_indent > indent:
-            # reset all counts in higher indented levels
-            prefix = '{}:{}:{}:'.format(
-                frame_info.parent and frame_info.parent.id,
-                frame_info.filepath,
-                frame_info.funcname,
-            )
-            for some_uid in self._uid_gen.keys():
-                if some_uid.startswith(prefix):
-                    some_indent = int(some_uid.rsplit(':', 1)[1])
-                    if some_indent > indent:
-                        self._scoped_indexes[some_uid] = 0
-        self._last_indent = indent
-        
-        uid = self._uid_gen['{}:{}:{}:{}'.format(
+        key = (
             frame_info.parent and frame_info.parent.id,
             frame_info.filepath,
             frame_info.funcname,
-            frame_info.indentation,
-        )]
+        )
+        indent = frame_info.indentation
+        with self._lock:
+            return self._update_scoped_index(key, indent)
+    
+    def _update_scoped_index(
+        self, key: T.Counter.ScopeKey, indent: T.Counter.Indent
+    ) -> t.Tuple[T.Counter.Index, T.Counter.UniqueId, T.Counter.ColorHex]:
+        """
+        note: must be called with `self._lock` held.
+        """
+        if (scope := self._scopes.get(key)) is None:
+            scope = self._scopes[key] = {'last_indent': 0, 'levels': {}}
+            if len(self._scopes) > self.max_scopes:
+                self._evict_scope(next(iter(self._scopes)))
+        else:
+            self._scopes.move_to_end(key)
+        
+        if scope['last_indent'] > indent:
+            # reset all counts in higher indented levels of this scope.
+            for some_indent, some_uid in scope['levels'].items():
+                if some_indent > indent:
+                    self._scoped_indexes[some_uid] = 0
+        scope['last_indent'] = indent
+        
+        if (uid := scope['levels'].get(indent)) is None:
+            uid = scope['levels'][indent] = self._generate_uid()
         self._scoped_indexes[uid] += 1
         return self._scoped_indexes[uid], uid, self._uid_2_color[uid]
     
+    def _evict_scope(self, key: T.Counter.ScopeKey) -> None:
+        for uid in self._scopes.pop(key)['levels'].values():
+            self._scoped_indexes.pop(uid, None)
+            self._uid_2_color.pop(uid, None)
+    
     def reset_all_indexes(self) -> None:
-        self._scoped_indexes.clear()
-        self._line_indexes.clear()
-        self._global_index = 0
+        with self._lock:
+            self._scoped_indexes.clear()
+            self._line_indexes.clear()
+            self._global_index = 0
 
 
 markup_analyzer = MarkupAnalyzer()
@@ -8,12 +8,14 @@ from rich.traceback import Traceback
 from .console import console
 from .markup import MarkMeaning
 from .markup import T as T0
+from .markup import plain_meanings
 from .message_formatter import formatter
 
 
 class MessageStruct:
     head: t.Optional[Text]
     body: Text
+    record = None  # set by logger if there are file sinks, see `.file_sink`.
     _reverse: bool
     
     def __init__(self, head: t.Optional[Text], body: Text, reverse=False):
@@ -79,11 +81,33 @@ class MessageStruct:
             return self.body
 
 
+class PlainMessage:
+    """
+    the plain text counterpart of `MessageStruct`. see `MessageBuilder -
+    .compose_plain`.
+    """
+    head: str
+    body: str
+    record = None  # see `MessageStruct.record`.
+    
+    def __init__(self, head: str, body: str) -> None:
+        self.head = head
+        self.body = body
+    
+    @property
+    def text(self) -> str:
+        text = self.head + self.body
+        if '\t' in text:  # like rich does when rendering.
+            return text.expandtabs(8)
+        return text
+
+
 class T:
     Args = t.Tuple[t.Any, ...]
     Markup = T0.Markup
     MarksMeaning = T0.MarksMeaning
     MessageStruct = MessageStruct
+    PlainMessage = PlainMessage
     RichText = Text
     
     Info = t.TypedDict(
@@ -99,14 +123,20 @@ class T:
 
 
 class MessageBuilder:
+    plain_meanings = plain_meanings  # supported by `compose_plain`.
+    _head_cache: t.Dict[tuple, Text]
+    #   the finished head per call site and config. see `_get_head`.
+    _max_head_cache = 4096
     _separator_a: Text  # l2r sep
     _separator_b: Text  # var sep
     _separator_c: Text  # r2l sep
     
     def __init__(self, **kwargs) -> None:
+        self._head_cache = {}
         self.update_config(**kwargs)
     
     def update_config(self, **config) -> None:
+        self._head_cache.clear()
         # https://fsymbols.com/signs/arrow/
         self._separator_a = Text(' >  ', 'bright_black')
         #   alternatives: ➤ ⪢ > >> -> ~> | │
@@ -134,58 +164,11 @@ class MessageBuilder:
             MarkMeaning.AGRESSIVE_PRUNE in marks_meaning
         )
         
-        head = Text()
+        head = self._get_head(
+            info, show_source, show_funcname, sourcemap_alignment
+        )
         body = Text()
         
-        # 1. source
-        if show_source:
-            head_part_1 = formatter.fmt_source(
-                info['file_path'],
-                info['line_number'],
-                is_external_lib=info['is_external_lib'],
-                fmt_width=True,
-            )
-            # head.append_text(
-            #     formatter.fmt_source(
-            #         info['file_path'],
-            #         info['line_number'],
-            #         is_external_lib=info['is_external_lib'],
-            #         fmt_width=True,
-            #     )
-            # )
-            # head.append_text(self._separator_a)
-        else:
-            head_part_1 = None
-        
-        # 2. funcname
-        if show_funcname:
-            assert info['function_name']
-            head_part_2 = formatter.fmt_funcname(
-                info['function_name'],
-                fmt_width=True,
-            )
-            # head.append_text(
-            #     formatter.fmt_funcname(
-            #         info['function_name'],
-            #         fmt_width=True,
-            #     )
-            # )
-            # head.append_text(self._separator_a)
-        else:
-            head_part_2 = None
-        
-        if head_part_1 or head_part_2:
-            if sourcemap_alignment == 'left':
-                head = Text.assemble(
-                    *(head_part_1 and (head_part_1, self._separator_a) or ()),
-                    *(head_part_2 and (head_part_2, self._separator_a) or ()),
-                )
-            else:
-                head = Text.assemble(
-                    *(head_part_2 and (self._separator_c, head_part_2) or ()),
-                    *(head_part_1 and (self._separator_c, head_part_1) or ()),
-                )
-        
         # if not self._show_source and not self._show_funcname:
         #     head = None
         # if len(head) == 0:
@@ -301,6 +284,94 @@ class MessageBuilder:
             head, body, reverse=(sourcemap_alignment == 'right')
         )
     
+    def compose_plain(
+        self,
+        args: T.Args,
+        marks_meaning: T.MarksMeaning,
+        info: T.Info,
+        show_source: bool = True,
+        show_funcname: bool = True,
+        show_varnames: bool = False,
+        show_verbosity_tag: bool = False,
+    ) -> PlainMessage:
+        """
+        a fast path of `compose` that builds the message with plain string -
+        operations. it produces the same text as `compose(...).text.plain`, -
+        but only supports the cases listed in `plain_meanings`, and left -
+        sourcemap alignment.
+        """
+        head = self._get_head(info, show_source, show_funcname, 'left').plain
+        body = formatter.fmt_message_plain(
+            args,
+            varnames=info['variable_names'] if show_varnames else (),
+            separator=self._separator_b.plain,
+        )
+        if show_verbosity_tag and MarkMeaning.VERBOSITY in marks_meaning:
+            level = marks_meaning[MarkMeaning.VERBOSITY]
+            body = '{} {}'.format(formatter.fmt_level(level).plain, body)
+        return PlainMessage(head, body)
+    
+    def _get_head(
+        self,
+        info: T.Info,
+        show_source: bool,
+        show_funcname: bool,
+        sourcemap_alignment: t.Literal['left', 'right'],
+    ) -> Text:
+        """
+        the returned text is shared between messages from the same call -
+        site, do not modify it.
+        """
+        key = (
+            show_source and info['file_path'],
+            show_source and info['line_number'],
+            show_source and info['is_external_lib'],
+            show_funcname and info['function_name'],
+            sourcemap_alignment,
+        )
+        if (head := self._head_cache.get(key)) is not None:
+            return head
+        
+        # 1. source
+        if show_source:
+            head_part_1 = formatter.fmt_source(
+                info['file_path'],
+                info['line_number'],
+                is_external_lib=info['is_external_lib'],
+                fmt_width=True,
+            )
+        else:
+            head_part_1 = None
+        
+        # 2. funcname
+        if show_funcname:
+            assert info['function_name']
+            head_part_2 = formatter.fmt_funcname(
+                info['function_name'],
+                fmt_width=True,
+            )
+        else:
+            head_part_2 = None
+        
+        if head_part_1 or head_part_2:
+            if sourcemap_alignment == 'left':
+                head = Text.assemble(
+                    *(head_part_1 and (head_part_1, self._separator_a) or ()),
+                    *(head_part_2 and (head_part_2, self._separator_a) or ()),
+                )
+            else:
+                head = Text.assemble(
+                    *(head_part_2 and (self._separator_c, head_part_2) or ()),
+                    *(head_part_1 and (self._separator_c, head_part_1) or ()),
+                )
+        else:
+            head = Text()
+        
+        if len(self._head_cache) >= self._max_head_cache:
+            self._head_cache.clear()
+        self._head_cache[key] = head
+        return head
+    
     @staticmethod
     def compose_exception(e: BaseException, show_locals: bool) -> Traceback:
         return formatter.fmt_exception(e, show_locals)
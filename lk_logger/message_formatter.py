@@ -14,9 +14,12 @@ from types import GeneratorType
 
 import rich
 # noinspection PyProtectedMember
+from rich._emoji_replace import _emoji_replace
+# noinspection PyProtectedMember
 from rich._inspect import Inspect
 from rich.box import ROUNDED as BOX_ROUNDED
 from rich.console import RenderableType
+from rich.control import strip_control_codes
 from rich.markdown import Markdown
 from rich.padding import Padding
 from rich.pretty import pretty_repr
@@ -262,6 +265,28 @@ class MessageFormatter:
         
         return text
     
+    def fmt_message_plain(
+        self,
+        arguments: t.Iterable[t.Any],
+        varnames: t.Tuple[str, ...],
+        separator: str,
+    ) -> str:
+        """
+        the plain text counterpart of `fmt_message(..., rich=False)`.
+        like `Text.from_markup`, control codes are stripped and emoji codes -
+        are replaced.
+        """
+        if varnames:
+            arguments = self._mix_arguments_with_varnames(
+                tuple(arguments), varnames
+            )
+        else:
+            arguments = map(str, arguments)
+        text = strip_control_codes(separator.join(arguments))
+        if ':' in text:
+            text = _emoji_replace(text)
+        return text
+    
     def fmt_scoped_index(
         self,
         idx: int,
@@ -0,0 +1,156 @@
+"""
+print from worker processes, render in the main process.
+
+workers only freeze the caller frame (see `.frame_info.FrozenFrameInfo`) and
+send it along with the arguments to a queue. a listener thread in the main
+process receives them and logs through the normal logger, so sourcemap,
+varnames and markups work as usual, and outputs from many workers never
+interleave.
+
+usage:
+    from concurrent.futures import ProcessPoolExecutor
+    import lk_logger
+    
+    def work(n):
+        print(':i', n)
+    
+    with lk_logger.process_sink() as queue:
+        with ProcessPoolExecutor(
+            16, initializer=lk_logger.setup_worker, initargs=(queue,)
+        ) as pool:
+            pool.map(work, range(100))
+
+test case:
+    tests/multiprocess_logging.py
+"""
+import builtins
+import pickle
+import typing as t
+from contextlib import contextmanager
+from inspect import currentframe
+from threading import Thread
+
+from .frame_info import FrozenFrameInfo
+from .frame_info import freeze_frame_info
+from .logger import logger
+from .markup import markup_analyzer
+from .printer import BasePrinter
+
+
+class T:
+    Args = t.Tuple[t.Any, ...]
+    Kwargs = t.Dict[str, t.Any]
+    Payload = bytes  # pickled `Record`
+    Queue = t.Any  # `multiprocessing.Queue`, `Manager().Queue()`, etc.
+    Record = t.Tuple[FrozenFrameInfo, Args, Kwargs]
+
+
+class ProcessSink:
+    """
+    the listener side, runs in the main process.
+    """
+    _queue: T.Queue
+    _thread: t.Optional[Thread]
+    
+    def __init__(self, queue: T.Queue = None) -> None:
+        if queue is None:
+            # lazy import. `multiprocessing` is heavy to import.
+            from multiprocessing import Queue
+            queue = Queue()
+        self._queue = queue
+        self._thread = None
+    
+    @property
+    def queue(self) -> T.Queue:
+        return self._queue
+    
+    def start(self) -> None:
+        assert self._thread is None
+        self._thread = Thread(target=self._listen, daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """
+        wait for all received records been logged, then stop listening.
+        note: make sure all workers have exited before calling this.
+        """
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+    
+    def _listen(self) -> None:
+        while (payload := self._queue.get()) is not None:
+            frame_info, args, kwargs = pickle.loads(payload)
+            logger.log(*args, _frame_info=frame_info, **kwargs)
+
+
+class WorkerPrinter(BasePrinter):
+    """
+    the sender side, replaces `builtins.print` in worker processes.
+    """
+    
+    def __init__(self, queue: T.Queue) -> None:
+        self._queue = queue
+    
+    def __call__(self, *args: t.Any, **kwargs) -> None:
+        # file-like objects are not picklable, and the output stream is -
+        # decided by the main process anyway.
+        kwargs.pop('file', None)
+        kwargs.pop('flush', None)
+        frame_info = freeze_frame_info(
+            currentframe().f_back, self._get_traceback_level(args)
+        )
+        try:
+            payload = pickle.dumps((frame_info, args, kwargs))
+        except Exception:
+            # unpicklable arguments are sent as their string forms.
+            payload = pickle.dumps(
+                (frame_info, tuple(map(str, args)), kwargs)
+            )
+        self._queue.put(payload)
+    
+    @staticmethod
+    def _get_traceback_level(args: T.Args) -> int:
+        """
+        how many parent layers the main process needs, according to the -
+        markup (`:p` and `:i` marks).
+        """
+        if args and isinstance(args[0], str) and args[0].startswith(':'):
+            markup = args[0]
+        elif (
+            len(args) > 1 and
+            isinstance(args[-1], str) and
+            args[-1].startswith(':')
+        ):
+            markup = args[-1]
+        else:
+            return 0
+        if not markup_analyzer.is_valid_markup(markup):
+            return 0
+        marks = markup_analyzer.extract(markup)
+        level = marks['p'] if 'p' in marks else 0
+        if 'i' in marks:  # scoped index needs the parent of target frame.
+            level += 1
+        return level
+
+
+def setup_worker(queue: T.Queue) -> None:
+    """
+    call this in each worker process, for example as the `initializer` of -
+    `concurrent.futures.ProcessPoolExecutor` or `multiprocessing.Pool`.
+    """
+    setattr(builtins, 'print', WorkerPrinter(queue))
+
+
+@contextmanager
+def process_sink(queue: T.Queue = None) -> t.Iterator[T.Queue]:
+    """
+    yields a queue, pass it to `setup_worker` in worker processes.
+    """
+    sink = ProcessSink(queue)
+    sink.start()
+    try:
+        yield sink.queue
+    finally:
+        sink.stop()
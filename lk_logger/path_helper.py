@@ -1,42 +1,126 @@
 import os
 import sys
 import typing as t
-from functools import cached_property
+from functools import lru_cache
 from os.path import abspath
 from os.path import basename
+from os.path import dirname
+from os.path import isfile
+from os.path import splitext
+from threading import Lock
 
 from .printer import dbg_print  # noqa
 
 
+class T:
+    LibRoot = t.Tuple[str, str]
+    #   (base dir, lib name). a relative path to the base dir starts with -
+    #   the lib name, unless the file lies directly in the base dir.
+    Match = t.Dict[str, t.Tuple[str, t.Any]]
+    #   {slot: (matched prefix, value), ...}. see `PathRouter.match`.
+    Node = t.Dict[t.Optional[str], t.Any]
+    #   {path component: child node, ..., None: {slot: (prefix, value)}}
+
+
 def normpath(path: str) -> str:
     return abspath(path).replace('\\', '/').rstrip('/')
 
 
-class PathHelper:
-    _cwd: str
-    _cwdp: str
+class PathRouter:
+    """
+    a trie of path prefixes (directories or files), shared by the rules that -
+    depend on where a message comes from. each rule kind has its own slot:
+        'lib': external library roots, see `PathHelper`.
+        'print': deflected paths, see `.deflector.Deflector.add`.
+        'verbosity': min verbosities, see `.deflector.Deflector -
+            .set_min_verbosity`.
+    one lookup walks the path components once, and finds the longest -
+    matching prefix of every slot. results are kept in a bounded lru cache, -
+    which is cleared when a rule changes.
+    """
+    cache_size: int = 4096
+    match: t.Callable[[str], T.Match]
+    #   params: a file path, it doesn't need to be normalized.
+    #   returns: a read-only dict, only matched slots are present.
+    _lock: Lock
+    _root: T.Node
     
-    @cached_property
-    def _external_libs(self) -> t.Dict[str, str]:  # {libpath: libname, ...}
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._root = {}
+        self.match = lru_cache(self.cache_size)(self._match)
+    
+    def add(self, slot: str, path: str, value: t.Any) -> None:
         """
-        suggest deferring this method til the first print is called.
+        params:
+            path: a normalized path, see `normpath`.
         """
+        with self._lock:
+            node = self._root
+            for part in path.rstrip('/').split('/'):  # '/' -> ['']
+                node = node.setdefault(part, {})
+            node.setdefault(None, {})[slot] = (path, value)
+            self.match.cache_clear()
+    
+    def remove(self, slot: str, path: str) -> None:
+        with self._lock:
+            node = self._root
+            for part in path.rstrip('/').split('/'):  # '/' -> ['']
+                if (node := node.get(part)) is None:
+                    return
+            if values := node.get(None):
+                values.pop(slot, None)
+            self.match.cache_clear()
+    
+    def _match(self, path: str) -> T.Match:
+        if not path.startswith('<'):
+            path = normpath(path)
         out = {}
-        for d in set(map(normpath, sys.path)):
-            if os.path.exists(d):
-                out[d] = basename(d)
+        node = self._root
+        for part in path.split('/'):
+            if (node := node.get(part)) is None:
+                break
+            if values := node.get(None):
+                out.update(values)  # the deeper one overrides.
         return out
-    
-    @cached_property
-    def _external_libkeys(self) -> t.Tuple[str, ...]:
-        # dbg_print(sorted(self._external_libs.keys(), reverse=True))
-        return tuple(
-            sorted(self._external_libs.keys(), reverse=True)
-        )
+
+
+path_router = PathRouter()
+
+
+class PathHelper:
+    """
+    external library roots are registered in `path_router` (slot 'lib'):
+        - entries of `sys.path`, including zip archives (zipapps, eggs). -
+            before each lookup, the length, the first and the last entries -
+            of `sys.path` are compared with a snapshot (by identity), which -
+            catches appends, inserts, removals and reassignment. then the -
+            whole list is diffed, only the changed entries are -
+            (un)registered. note: replacing an entry in the middle, with -
+            the length unchanged, is not noticed.
+        - portions of top level packages that are not under any `sys.path` -
+            entry, e.g. editable installs and namespace packages. they are -
+            collected from `sys.modules` when a lookup misses and new modules -
+            have been imported since the last collection.
+    """
+    _cwd: str
+    _cwdp: str
+    _lib_roots: t.Set[str]  # normalized `sys.path` entries.
+    _lock: Lock
+    _module_count: int
+    _normpaths: t.Dict[str, str]  # {raw sys.path entry: normalized, ...}
+    _packages: t.Set[str]  # names of collected top level packages.
+    _sys_path: t.List[str]  # the snapshot of `sys.path`.
     
     def __init__(self) -> None:
         self._cwd = normpath(os.getcwd())
         self._cwdp = self._cwd.rsplit('/', 1)[0]
+        self._lib_roots = set()
+        self._lock = Lock()
+        self._module_count = 0
+        self._normpaths = {}
+        self._packages = set()
+        self._sys_path = []  # synced on the first lookup.
     
     def _check_path_type(self, xpath: str) -> int:
         """
@@ -56,6 +140,65 @@ class PathHelper:
         else:
             return 2
     
+    def _match_lib(self, path: str) -> t.Optional[T.LibRoot]:
+        entries, known = sys.path, self._sys_path
+        if len(entries) != len(known) or entries and (
+            entries[0] is not known[0] or entries[-1] is not known[-1]
+        ):
+            self._sync_sys_path()
+        if x := path_router.match(path).get('lib'):
+            return x[1]
+        if len(sys.modules) != self._module_count:
+            self._sync_packages()
+            if x := path_router.match(path).get('lib'):
+                return x[1]
+        return None
+    
+    def _sync_sys_path(self) -> None:
+        with self._lock:
+            entries = list(sys.path)
+            roots = set()
+            for x in entries:
+                if not isinstance(x, str):
+                    continue
+                if (root := self._normpaths.get(x)) is None:
+                    root = self._normpaths[x] = normpath(x)
+                roots.add(root)
+            for root in self._lib_roots - roots:
+                path_router.remove('lib', root)
+            for root in roots - self._lib_roots:
+                # a missing entry matches nothing, but it may be created -
+                # later.
+                name = basename(root)
+                if isfile(root):  # a zip archive, e.g. 'app.pyz'.
+                    name = splitext(name)[0]
+                path_router.add('lib', root, (root, name))
+            self._lib_roots = roots
+            self._normpaths = {
+                k: v for k, v in self._normpaths.items() if v in roots
+            }
+            self._sys_path = entries
+    
+    def _sync_packages(self) -> None:
+        with self._lock:
+            self._module_count = len(sys.modules)
+            for name, module in tuple(sys.modules.items()):
+                if '.' in name or name in self._packages:
+                    continue
+                self._packages.add(name)
+                try:
+                    portions = tuple(getattr(module, '__path__', ()))
+                except Exception:  # e.g. a lazy module.
+                    continue
+                for portion in portions:
+                    if not isinstance(portion, str):
+                        continue
+                    portion = normpath(portion)
+                    if not path_router.match(portion).get('lib'):
+                        path_router.add(
+                            'lib', portion, (dirname(portion), name)
+                        )
+    
     def is_external_path(self, path: str) -> bool:
         return self._check_path_type(path) >= 2
     
@@ -66,16 +209,14 @@ class PathHelper:
         elif path_type == 1:
             return '../{}'.format(path[len(self._cwdp) + 1:])
         elif path_type == 2:
-            for libpath in self._external_libkeys:
-                if path.startswith(libpath):
-                    relpath = path[len(libpath) + 1:]
-                    # dbg_print(libpath, path, relpath)
-                    if '/' in relpath:
-                        return '[{}]/{}'.format(*relpath.split('/', 1))
-                    else:
-                        return '[{}]/{}'.format(
-                            libpath.rsplit('/', 1)[-1], relpath
-                        )
+            if lib := self._match_lib(path):
+                base, name = lib
+                relpath = path[len(base) + 1:]
+                # dbg_print(base, path, relpath)
+                if '/' in relpath:
+                    return '[{}]/{}'.format(*relpath.split('/', 1))
+                else:
+                    return '[{}]/{}'.format(name, relpath)
             a, b, c = path.rsplit('/', 2)
             return '[unknown]/{}/{}'.format(b, c)
         else:
@@ -86,12 +227,8 @@ class PathHelper:
         if path_type == 0 or path_type == 1:
             return basename(xpath)
         elif path_type == 2:
-            for libpath in self._external_libkeys:
-                if xpath.startswith(libpath):
-                    return '[{}]/{}'.format(
-                        self._external_libs[libpath],
-                        basename(xpath)
-                    )
+            if lib := self._match_lib(xpath):
+                return '[{}]/{}'.format(lib[1], basename(xpath))
             return '[unknown]/{}'.format(basename(xpath))
         else:
             return '[unknown {}]'.format(xpath)
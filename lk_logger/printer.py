@@ -5,6 +5,7 @@ from inspect import currentframe
 from contextlib import contextmanager
 from functools import partial
 from pprint import pformat
+from threading import local
 
 from .console import console
 
@@ -57,29 +58,38 @@ class T:
     Printers = t.Tuple[Printer, ...]
 
 
+class _IteratingFlag(local):
+    value = False  # the default value of each thread.
+
+
 class PrinterManager:
     _group: t.List[T.Printers]
-    _is_under_iterating: bool
+    _is_under_iterating: _IteratingFlag
+    #   per thread. a printer in one thread must not hide the printers from -
+    #   another thread.
     
     def __init__(self) -> None:
         # self.is_scoping = False
         # self._group = [(std_print,)]
         self._group = [()]
-        self._is_under_iterating = False
+        self._is_under_iterating = _IteratingFlag()
     
     @property
     def printers(self) -> t.Iterator[T.Printer]:
         # prevent recursive call
-        if self._is_under_iterating:
+        flag = self._is_under_iterating
+        if flag.value:
             # dprint('under iteration')
             return
-        self._is_under_iterating = True
-        yield from self._group[-1]
-        self._is_under_iterating = False
+        flag.value = True
+        try:
+            yield from self._group[-1]
+        finally:
+            flag.value = False
     
     def add_group(self, printers: T.Printers) -> None:
         self._group.append(printers)
-        
+    
     def pop_group(self) -> None:
         self._group.pop()
 
@@ -0,0 +1,148 @@
+"""
+an alternative scanner based on the standard `ast` and `tokenize` modules.
+
+it yields the same (element, type) pairs as `.scanner.get_variables`, so -
+`..sourcemap.SourceMap` can switch between them (see `LoggingConfig -
+.sourcemap_backend`).
+
+differences from `.scanner`:
+    - print calls are found by the parser, not by the text prefix. so -
+      calls like `x = print(a)`, `if a: print(a)` and `logger.log(a)` are -
+      also indexed.
+    - a lambda argument doesn't discard the whole print call, it is just -
+      treated as an anonymous element.
+    - parentheses around an element are ignored, e.g. `(a)` is reported as -
+      `a`, and `(c := a + b)` as `c`.
+
+test case:
+    tests/test_sourcemap_backends.py
+"""
+import ast
+import tokenize
+import typing as t
+from io import StringIO
+from textwrap import dedent
+
+from .const import LAMBDA_EXPRESSION
+from .scanner import classify_element
+
+_CALLEE_NAMES = ('print',)
+_CALLEE_ATTRS = ('log', 'print')  # e.g. `logger.log(...)`
+_CALLEE_OWNERS = ('lk_logger', 'logger')
+#   only the methods of these names count, `math.log(...)` is not a print -
+#   call.
+
+
+class T:
+    Element = t.Tuple[str, int]  # (element, type)
+    Elements = t.List[Element]
+    Lines = t.Sequence[str]  # lines with line breaks, as `linecache.getlines`
+
+
+def get_print_calls(source: str) -> t.Iterator[t.Tuple[int, T.Elements]]:
+    """
+    yield (lineno, elements) of print calls in source. if there are multiple -
+    calls starting at the same line, a bare `print(...)` is preferred over -
+    `logger.log(...)`, then the outermost (or the first) one is yielded.
+    
+    raises: SyntaxError.
+    """
+    tree = ast.parse(source)
+    lines = StringIO(source).readlines()
+    calls = {}  # {lineno: (rank, node), ...}
+    # `ast.walk` is breadth-first, so outer calls come before nested ones.
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call) and
+            (rank := _rank_print_call(node)) and
+            rank > calls.get(node.lineno, (0,))[0]
+        ):
+            calls[node.lineno] = (rank, node)
+    for lineno, (_, node) in calls.items():
+        yield lineno, _get_elements(lines, node)
+
+
+def get_print_call_at(
+    lines: T.Lines, lineno: int, end_lineno: int = None
+) -> t.Optional[T.Elements]:
+    """
+    analyse the print call starting at `lineno`, without parsing the whole -
+    file.
+    
+    params:
+        end_lineno: optional. if not given, `tokenize` is used to find the -
+            end of the logical line.
+    returns: elements, or None if the statement cannot be parsed alone (for -
+        example it is a part of a compound statement like `else: print(a)`) -
+        or there is no print call at the line. the caller should fall back -
+        to `get_print_calls` then.
+    """
+    if end_lineno is None:
+        if (end_lineno := _find_logical_line_end(lines, lineno)) is None:
+            return None
+    source = dedent(''.join(lines[lineno - 1:end_lineno]))
+    try:
+        for lineno_, elements in get_print_calls(source):
+            if lineno_ == 1:
+                return elements
+    except SyntaxError:
+        pass
+    return None
+
+
+def _rank_print_call(node: ast.Call) -> int:
+    """
+    returns: 2 for `print(...)`, 1 for `logger.log(...)`, `lk_logger.logger -
+        .print(...)` etc., 0 if it is not a print call.
+    """
+    func = node.func
+    if isinstance(func, ast.Name):
+        return 2 if func.id in _CALLEE_NAMES else 0
+    if isinstance(func, ast.Attribute) and func.attr in _CALLEE_ATTRS:
+        owner = func.value
+        if isinstance(owner, ast.Name):
+            return 1 if owner.id in _CALLEE_OWNERS else 0
+        if isinstance(owner, ast.Attribute):
+            return 1 if owner.attr in _CALLEE_OWNERS else 0
+    return 0
+
+
+def _get_elements(lines: T.Lines, node: ast.Call) -> T.Elements:
+    out = []
+    for arg in node.args:  # keyword arguments are not in `node.args`.
+        if isinstance(arg, ast.Lambda):
+            out.append(('', LAMBDA_EXPRESSION))
+            continue
+        if x := classify_element(_get_source_segment(lines, arg).strip()):
+            out.append(x)
+    return out
+
+
+def _get_source_segment(lines: T.Lines, node: ast.expr) -> str:
+    """
+    like `ast.get_source_segment`, but reuses the split lines. (the former -
+    splits the whole source on every call, which makes indexing a big file -
+    quadratic.)
+    note: `col_offset` is counted in utf-8 bytes.
+    """
+    start, end = node.lineno - 1, node.end_lineno - 1
+    if start == end:
+        return lines[start].encode()[
+            node.col_offset:node.end_col_offset
+        ].decode()
+    return ''.join((
+        lines[start].encode()[node.col_offset:].decode(),
+        *lines[start + 1:end],
+        lines[end].encode()[:node.end_col_offset].decode(),
+    ))
+
+
+def _find_logical_line_end(lines: T.Lines, lineno: int) -> t.Optional[int]:
+    iterator = iter(lines[lineno - 1:])
+    try:
+        for token in tokenize.generate_tokens(lambda: next(iterator, '')):
+            if token.type in (tokenize.NEWLINE, tokenize.ENDMARKER):
+                return lineno + token.end[0] - 1
+    except (IndentationError, tokenize.TokenError):
+        return None
+    return None
@@ -23,6 +23,7 @@ SIMPLE_NUMBER = 3  # simple int or float. e.g. 1, 2, 3, 1.0, 2.0, 3.0, and
 #   negative number. but not support 1E10, 1., 2., 3., (they are treated as
 #   VARIABLE_NAME)
 NESTED_STRUCT = 4  # starts with '(' or '[' or '{'
+LAMBDA_EXPRESSION = 5  # only reported by `ast_scanner.py`
 
 # PAIRED SYMBOLS
 PAIRED_SYMBOLS = {
@@ -86,7 +86,7 @@ def get_all_blocks(*lines: str, end_mark='\n'):
 
 def get_variables(line: str):
     """
-
+    
     Workflow:
         1. single_line = 'A, (B, C)'
         2. split by comma: ['A', '(B', 'C)']
@@ -94,14 +94,6 @@ def get_variables(line: str):
            pairable symbols): ['A', '(B, C)']
         4. now we know there are two elements in single_line: `A` and `(B, C)`
     """
-    caller_pattern = compile(r'^([.\w]+)[(\[{]')  # matching: 'requests.get('
-    kwargs_pattern = compile(r'^\w+ *=')  # matching: 'a=1'
-    lambda_pattern = compile(r'^lambda ')  # matching: 'lambda *_, **__: ...'
-    nested_pattern = compile(r'^[(\[{]')  # matching: '(...', '[...', '{...'
-    number_pattern = compile(r'^-?\d+(?:\.\d+)?$')  # matching: '123', '-123'
-    quotes_pattern = compile(r'^[bfru]*[\'"]')  # matching: '"hello', 'b"hello'
-    walrus_pattern = compile(r'^(\w+) *:=')  # mathcing: 'x := 12'
-    
     for match0 in get_all_blocks(line):
         start, end = match0.span()  # exterior brackets span
         line = line[start + 1:end].rstrip(whitespace + ',')
@@ -120,59 +112,79 @@ def get_variables(line: str):
                     None
                 )
             
-            if quotes_pattern.match(element):
-                yield element, QUOTED_STRING
-            elif number_pattern.match(element):
-                yield element, SIMPLE_NUMBER
-            elif kwargs_pattern.match(element):
-                continue  # continue or break out
-            elif nested_pattern.match(element):
-                yield element, NESTED_STRUCT
-            elif lambda_pattern.match(element):
-                ''' TODO (memo)
-                
-                How it happened?
-                    For example:
-                        line = 'lambda *args, **kwargs: None'
-                        
-                    When scanner goes here:
-                        lambda *args, **kwargs: None
-                                    ^
-                    Because 'lambda *args' is a 'complete' part (no unresolved
-                    brackets, quotes, etc. left), it treats this comma symbol
-                    as an end mark, so scanner thinks it can be submitted and
-                    yields 'lambda *args' as an 'element' to the caller.
-                    
-                    The caller (`lk_logger.sourcemap`) receives 'lambda *args'
-                    and '**kwargs: None' one after another, so caller thinks
-                    there're two elements found. But when logger tries to
-                    demonstrate their number is equivalent (see `lk_logger
-                    .logger.format > code:'assert len(info.varnames) ==
-                    len(data)'`), an AssertionError is raised.
-                
-                How to resolve it (in the future)?
-                    Before handling this example line, replace the comma with a
-                    mask symbol. After handling is over, restore it.
-                '''
-                raise UnresolvedCase('''
-                    We didn't find an ideal way to handle lambda expression
-                    without breaking currently designed function.
-                    The caller should catch this exception and it has to
-                    abandon all its collected varnames which came from this
-                    function. Say just take it as nothing received from here.
-                ''')
-                # see `~/lk_logger/sourcemap.py > class:SourceMap > method:
-                # _indexing_filemap`
-            elif m := walrus_pattern.match(element):
-                yield m.group(1), VARIABLE_NAME
-            elif caller_pattern.match(element):
-                yield element, SUBSCRIPTABLE
-            else:
-                yield element, VARIABLE_NAME
+            if x := classify_element(element):
+                yield x
         
         break
 
 
+_caller_pattern = compile(r'^([.\w]+)[(\[{]')  # matching: 'requests.get('
+_kwargs_pattern = compile(r'^\w+ *=')  # matching: 'a=1'
+_lambda_pattern = compile(r'^lambda ')  # matching: 'lambda *_, **__: ...'
+_nested_pattern = compile(r'^[(\[{]')  # matching: '(...', '[...', '{...'
+_number_pattern = compile(r'^-?\d+(?:\.\d+)?$')  # matching: '123', '-123'
+_quotes_pattern = compile(r'^[bfru]*[\'"]')  # matching: '"hello', 'b"hello'
+_walrus_pattern = compile(r'^(\w+) *:=')  # mathcing: 'x := 12'
+
+
+def classify_element(element: str) -> Optional[Tuple[str, int]]:
+    """
+    classify one (stripped) argument text of a print call.
+    also used by `.ast_scanner`.
+    
+    returns: (element, type) or None for keyword arguments.
+    raises: UnresolvedCase for lambda expressions.
+    """
+    if _quotes_pattern.match(element):
+        return element, QUOTED_STRING
+    elif _number_pattern.match(element):
+        return element, SIMPLE_NUMBER
+    elif _kwargs_pattern.match(element):
+        return None
+    elif _nested_pattern.match(element):
+        return element, NESTED_STRUCT
+    elif _lambda_pattern.match(element):
+        ''' TODO (memo)
+        
+        How it happened?
+            For example:
+                line = 'lambda *args, **kwargs: None'
+            
+            When scanner goes here:
+                lambda *args, **kwargs: None
+                            ^
+            Because 'lambda *args' is a 'complete' part (no unresolved
+            brackets, quotes, etc. left), it treats this comma symbol
+            as an end mark, so scanner thinks it can be submitted and
+            yields 'lambda *args' as an 'element' to the caller.
+            
+            The caller (`lk_logger.sourcemap`) receives 'lambda *args'
+            and '**kwargs: None' one after another, so caller thinks
+            there're two elements found. But when logger tries to
+            demonstrate their number is equivalent (see `lk_logger
+            .logger.format > code:'assert len(info.varnames) ==
+            len(data)'`), an AssertionError is raised.
+        
+        How to resolve it (in the future)?
+            Before handling this example line, replace the comma with a
+            mask symbol. After handling is over, restore it.
+        '''
+        raise UnresolvedCase('''
+            We didn't find an ideal way to handle lambda expression
+            without breaking currently designed function.
+            The caller should catch this exception and it has to
+            abandon all its collected varnames which came from this
+            function. Say just take it as nothing received from here.
+        ''')
+        # see `~/lk_logger/sourcemap.py > func:_analyse_block`
+    elif m := _walrus_pattern.match(element):
+        return m.group(1), VARIABLE_NAME
+    elif _caller_pattern.match(element):
+        return element, SUBSCRIPTABLE
+    else:
+        return element, VARIABLE_NAME
+
+
 def _debug(linex, line, charx, char, symbols=None):
     print(visualize_line(linex, line, charx, char, symbols))
 
@@ -1,7 +1,11 @@
+import atexit
 import re
 import typing as t
+from linecache import getlines
 from os.path import exists
 
+from .cache.sourcemap import SourceMapCache
+from .scanner import ast_scanner
 from .scanner import get_all_blocks
 from .scanner import get_variables
 from .scanner.const import SUBSCRIPTABLE
@@ -12,128 +16,280 @@ from .scanner.exceptions import UnresolvedCase
 
 class T:
     VarNames = t.Tuple[str, ...]
-    SourceMap = t.Dict[str, t.Dict[int, VarNames]]
+    FileMap = t.Dict[int, VarNames]
+    SourceMap = t.Dict[str, FileMap]
 
 
 class SourceMap:
+    backend: t.Literal['ast', 'scanner']
+    #   see `LoggingConfig.sourcemap_backend`.
+    indexing: t.Literal['file', 'line']
+    #   'file': scan the whole file on its first lookup.
+    #   'line': scan only the block starting at the requested line, and -
+    #       cache it per line. fall back to 'file' if the line is not a -
+    #       block start.
+    persistent_cache: SourceMapCache
+    _complete: t.Set[str]  # files which are fully indexed.
+    _dirty: t.Set[str]  # partially indexed files that need to be persisted.
+    _indentations: t.Dict[str, t.Tuple[t.List[str], t.Tuple[int, ...]]]
+    #   {filepath: (lines, (indentation of line 1, line 2, ...)), ...}
+    #   lines: the list from `linecache`, see `get_indentation`.
     _sourcemap: T.SourceMap
     
     def __init__(self) -> None:
+        self.backend = 'scanner'
+        self.indexing = 'file'
+        self.persistent_cache = SourceMapCache()
+        self._complete = set()
+        self._dirty = set()
+        self._indentations = {}
         self._sourcemap = {}
+        atexit.register(self._save_dirty)
     
-    def get_varnames(self, filepath: str, lineno: int) -> T.VarNames:
-        if filepath not in self._sourcemap:
-            self._indexing_filemap(filepath)
-        return self._sourcemap[filepath].get(lineno, ())
+    def get_varnames(
+        self, filepath: str, lineno: int, end_lineno: int = None
+    ) -> T.VarNames:
+        """
+        params:
+            end_lineno: optional. the last line of the print call, if known -
+                (see `FrameInfo.end_lineno`). it bounds the scanning range -
+                in 'line' indexing mode.
+        """
+        if (filemap := self._sourcemap.get(filepath)) is None:
+            filemap = self._load_filemap(filepath)
+        if lineno in filemap:
+            return filemap[lineno]
+        if filepath in self._complete:
+            return ()
+        return self._indexing_line(filepath, lineno, end_lineno)
     
-    def _indexing_filemap(self, filepath: str) -> None:
+    def clear(self) -> None:
+        """
+        forget the in-memory indexes, e.g. when `backend` or `indexing` is -
+        about to change. partially indexed files are persisted first, under -
+        the current backend.
+        """
+        self._save_dirty()
+        self._complete.clear()
+        self._sourcemap.clear()
+    
+    def get_indentation(
+        self, filepath: str, lineno: int, module_globals: dict = None
+    ) -> int:
+        """
+        params:
+            filepath: the code object's `co_filename`, as `linecache` knows it.
+            module_globals: optional. helps `linecache` to load sources from -
+                zip files, etc.
+        returns: 0 if the line is unavailable.
+        note: an entry is valid as long as `linecache` holds the same lines -
+            for the file. they are replaced when `linecache.checkcache` -
+            finds the file's mtime or size changed (`..frame_info.FrameInfo -
+            .filepath` checks it for every new code object, e.g. a reloaded -
+            module), or when an `exec`'d source is registered again.
+        """
+        lines = getlines(filepath, module_globals)
+        if (x := self._indentations.get(filepath)) and x[0] is lines:
+            indents = x[1]
+        else:
+            indents = tuple(len(x) - len(x.lstrip()) for x in lines)
+            self._indentations[filepath] = (lines, indents)
+        if 0 < lineno <= len(indents):
+            return indents[lineno - 1]
+        return 0
+    
+    def _load_filemap(self, filepath: str) -> T.FileMap:
         if (
             filepath.startswith('<') or
             filepath.endswith('>') or
             not exists(filepath)
         ):
             # see `FrameInfo > property filepath > docstring notice`
-            self._sourcemap.setdefault(filepath, {})
-            return
-        
-        def get_blocks(lines: t.Iterator[str]) -> t.Dict[int, T.VarNames]:
-            out = {}
-            for match in get_all_blocks(*lines):
-                text = match.fulltext.strip()
-                if not text:
-                    continue
-                if not text.startswith('print'):  # FIXME: this is not stable
-                    continue
-                try:
-                    varnames = _analyse_block(text)
-                    lineno = match.cursor.lineno + 1
-                    out[lineno] = tuple(varnames)
-                except ScanningError:
-                    raise ScanningError(
-                        match.cursor.lineno + 1, text,
-                        0, '<unknown>',
-                        f'<filepath: {filepath}>'
-                    )
-            return out
+            self._complete.add(filepath)
+            return self._sourcemap.setdefault(filepath, {})
         
-        def _analyse_block(text: str) -> t.List[str]:
-            varnames = []
-            try:
-                for element, type_ in get_variables(text):
-                    if type_ == VARIABLE_NAME:
-                        varnames.append(element)
-                    elif type_ == SUBSCRIPTABLE:
-                        varnames.append(_analyse_subscriptables(
-                            element, shorten_sub_substrings=True
-                        ))
-                    else:
-                        varnames.append('')
-            except UnresolvedCase:
-                varnames.clear()
-            finally:
-                return varnames
+        if x := self.persistent_cache.load(filepath, self.backend):
+            filemap, complete = x
+            if complete or self.indexing == 'line':
+                if complete:
+                    self._complete.add(filepath)
+                return self._sourcemap.setdefault(filepath, filemap)
         
-        _quotes_pattern_1 = re.compile(r'\'\'\'[\w\W]*\'\'\'|"""[\w\W]*"""')
-        _quotes_pattern_2 = re.compile(r'\'[^\']*\'|"[^"]*"')
+        if self.indexing == 'line':
+            return self._sourcemap.setdefault(filepath, {})
+        return self._indexing_filemap(filepath)
+    
+    def _indexing_filemap(self, filepath: str) -> T.FileMap:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
         
-        def _analyse_subscriptables(
-            text: str,
-            shorten_sub_substrings: bool = True,
-            threshold: int = 20
-        ) -> str:
-            """
-            shorten_sub_strings:
-                example:
-                    case 1: when captured a "varname" like "xxx('hello world')":
-                        if shorten_sub_strings is True:
-                            varname updated: "xxx('...')"
-                        if shorten_sub_strings is False:
-                            varname updated: "xxx('hello world')"
-                    case 2: when captured a "varname" like "xxx('''hello world\n
-                            hello world\nhello world\nhello world\nhello...''')"
-                            (which is a very long sentense):
-                        if shorten_sub_strings is True:
-                            varname updated: "xxx('...')"
-                        if shorten_sub_strings is False:
-                            varname updated: "xxx('''hello world\nhello world\n
-                                hello world\nhello world\nhello world\n...)"
-                note: the character threshold length to trigger shortening a
-                    string is adjustable, the default threshold is 10 chars and
-                    must with no line break in it.
-            """
-            if not shorten_sub_substrings:
-                return text
-            
-            backslash_mask = []
-            for i in re.findall(r'\\.', text):
-                backslash_mask.append(i)
-            if backslash_mask:
-                text = re.sub(r'\\.', '__BACKSLASK_MASK__', text)
-            
-            for i in set(_quotes_pattern_1.findall(text)):
-                if '\n' in i or len(i) > threshold:
-                    text = text.replace(i, '"""..."""')
-            
-            for i in set(_quotes_pattern_2.findall(text)):
-                if '\n' in i or len(i) > threshold:
-                    text = text.replace(i, '"..."')
-            
-            # restore backslashes
-            if backslash_mask:
-                for i in backslash_mask:
-                    text = text.replace('__BACKSLASK_MASK__', i, 1)
-                del backslash_mask
-            
-            text = re.sub(r'\s+', ' ', text)
-            #   note: this ^measure takes a side effect that it may replace
-            #   sequential whitespaces to one whitespace inside quote strings.
-            
-            return text
+        filemap = None
+        if self.backend == 'ast':
+            try:
+                filemap = {
+                    lineno: tuple(_elements_to_varnames(elements))
+                    for lineno, elements in ast_scanner.get_print_calls(
+                        ''.join(lines)
+                    )
+                }
+            except SyntaxError:
+                # for example the file is written in a newer python syntax. -
+                # fall back to the classic scanner.
+                pass
+        if filemap is None:
+            filemap = {}
+            for match in get_all_blocks(*(x.rstrip('\n') for x in lines)):
+                lineno = match.cursor.lineno + 1
+                if (
+                    varnames := _analyse_print_block(
+                        match.fulltext, filepath, lineno
+                    )
+                ) is not None:
+                    filemap[lineno] = varnames
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            self._sourcemap.setdefault(
-                filepath, get_blocks((x.rstrip('\n') for x in f.readlines()))
+        self._sourcemap[filepath] = filemap
+        self._complete.add(filepath)
+        self._dirty.discard(filepath)
+        self.persistent_cache.dump(
+            filepath, filemap, complete=True, backend=self.backend
+        )
+        return filemap
+    
+    def _indexing_line(
+        self, filepath: str, lineno: int, end_lineno: int = None
+    ) -> T.VarNames:
+        if self.backend == 'ast':
+            elements = ast_scanner.get_print_call_at(
+                getlines(filepath), lineno, end_lineno
+            )
+            if elements is None:
+                return self._indexing_filemap(filepath).get(lineno, ())
+            varnames = tuple(_elements_to_varnames(elements))
+        else:
+            lines = getlines(filepath)[lineno - 1 : end_lineno or None]
+            match = next(
+                get_all_blocks(*(x.rstrip('\n') for x in lines)), None
+            )
+            if match is None:
+                # the line is not a block start, or the file has changed -
+                # since the module was loaded.
+                return self._indexing_filemap(filepath).get(lineno, ())
+            varnames = _analyse_print_block(match.fulltext, filepath, lineno)
+        self._sourcemap[filepath][lineno] = varnames = varnames or ()
+        self._dirty.add(filepath)
+        return varnames
+    
+    def _save_dirty(self) -> None:
+        for filepath in self._dirty:
+            self.persistent_cache.dump(
+                filepath, self._sourcemap[filepath],
+                complete=False, backend=self.backend
+            )
+        self._dirty.clear()
+
+
+def _analyse_print_block(
+    text: str, filepath: str, lineno: int = None
+) -> t.Optional[T.VarNames]:
+    """
+    returns None if the block is not a print call.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    if not text.startswith('print'):  # FIXME: this is not stable
+        return None
+    try:
+        return tuple(_analyse_block(text))
+    except ScanningError:
+        raise ScanningError(
+            lineno or 0, text,
+            0, '<unknown>',
+            f'<filepath: {filepath}>'
+        )
+
+
+def _analyse_block(text: str) -> t.List[str]:
+    varnames = []
+    try:
+        varnames.extend(_elements_to_varnames(get_variables(text)))
+    except UnresolvedCase:
+        varnames.clear()
+    finally:
+        return varnames
+
+
+def _elements_to_varnames(
+    elements: t.Iterable[t.Tuple[str, int]]
+) -> t.Iterator[str]:
+    for element, type_ in elements:
+        if type_ == VARIABLE_NAME:
+            yield element
+        elif type_ == SUBSCRIPTABLE:
+            yield _analyse_subscriptables(
+                element, shorten_sub_substrings=True
             )
+        else:
+            yield ''
+
+
+_quotes_pattern_1 = re.compile(r'\'\'\'[\w\W]*\'\'\'|"""[\w\W]*"""')
+_quotes_pattern_2 = re.compile(r'\'[^\']*\'|"[^"]*"')
+
+
+def _analyse_subscriptables(
+    text: str,
+    shorten_sub_substrings: bool = True,
+    threshold: int = 20
+) -> str:
+    """
+    shorten_sub_strings:
+        example:
+            case 1: when captured a "varname" like "xxx('hello world')":
+                if shorten_sub_strings is True:
+                    varname updated: "xxx('...')"
+                if shorten_sub_strings is False:
+                    varname updated: "xxx('hello world')"
+            case 2: when captured a "varname" like "xxx('''hello world\n
+                    hello world\nhello world\nhello world\nhello...''')"
+                    (which is a very long sentense):
+                if shorten_sub_strings is True:
+                    varname updated: "xxx('...')"
+                if shorten_sub_strings is False:
+                    varname updated: "xxx('''hello world\nhello world\n
+                        hello world\nhello world\nhello world\n...)"
+        note: the character threshold length to trigger shortening a
+            string is adjustable, the default threshold is 10 chars and
+            must with no line break in it.
+    """
+    if not shorten_sub_substrings:
+        return text
+    
+    backslash_mask = []
+    for i in re.findall(r'\\.', text):
+        backslash_mask.append(i)
+    if backslash_mask:
+        text = re.sub(r'\\.', '__BACKSLASK_MASK__', text)
+    
+    for i in set(_quotes_pattern_1.findall(text)):
+        if '\n' in i or len(i) > threshold:
+            text = text.replace(i, '"""..."""')
+    
+    for i in set(_quotes_pattern_2.findall(text)):
+        if '\n' in i or len(i) > threshold:
+            text = text.replace(i, '"..."')
+    
+    # restore backslashes
+    if backslash_mask:
+        for i in backslash_mask:
+            text = text.replace('__BACKSLASK_MASK__', i, 1)
+        del backslash_mask
+    
+    text = re.sub(r'\s+', ' ', text)
+    #   note: this ^measure takes a side effect that it may replace
+    #   sequential whitespaces to one whitespace inside quote strings.
+    
+    return text
 
 
 sourcemap = SourceMap()
@@ -0,0 +1,88 @@
+"""
+measure the event loop lag while logging at a high rate, with the normal -
+logger and with the async one.
+
+a ticker task sleeps 1ms in a loop and records how late it wakes up. a -
+producer task logs `rate` messages per second meanwhile.
+"""
+import asyncio
+import builtins
+import os
+from time import perf_counter
+
+import lk_logger
+from lk_logger import async_logger
+from lk_logger.console import console
+from lk_logger.logger import logger
+
+lk_logger.setup()
+
+
+async def _ticker(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = perf_counter()
+        await asyncio.sleep(1e-3)
+        lags.append(perf_counter() - start - 1e-3)
+
+
+async def _producer(rate: int, duration: float) -> int:
+    count = 0
+    step = rate // 1000  # messages per millisecond
+    start = perf_counter()
+    while (elapsed := perf_counter() - start) < duration:
+        if count < elapsed * rate:
+            for _ in range(step):
+                print('message', count)
+                count += 1
+            await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(1e-3)
+    return count
+
+
+async def measure(rate: int = 50000, duration: float = 2.0) -> dict:
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    start = perf_counter()
+    count = await _producer(rate, duration)
+    stop.set()
+    await ticker
+    duration = perf_counter() - start
+    if builtins.print == async_logger.log:
+        await async_logger.aflush()
+    lags.sort()
+    return {
+        'messages': count,
+        'seconds' : duration,
+        'drained' : perf_counter() - start,
+        'p50_ms'  : lags[len(lags) // 2] * 1000,
+        'p99_ms'  : lags[int(len(lags) * 0.99)] * 1000,
+        'max_ms'  : lags[-1] * 1000,
+    }
+
+
+def main() -> None:
+    results = {}
+    backup = console.file
+    with open(os.devnull, 'w') as devnull:
+        console.file = devnull  # we only care about the loop.
+        
+        results['sync'] = asyncio.run(measure())
+        logger._wait_drained()
+        
+        lk_logger.setup_async(quiet=True)
+        results['async'] = asyncio.run(measure())
+        lk_logger.setup(quiet=True)
+        
+        console.file = backup
+    for k, v in results.items():
+        print(':v4', k, '{messages} messages in {seconds:.1f}s (all printed in '
+              '{drained:.1f}s), loop lag: '
+              'p50 {p50_ms:.2f}ms, p99 {p99_ms:.2f}ms, '
+              'max {max_ms:.2f}ms'.format(**v))
+
+
+if __name__ == '__main__':
+    # pox tests/asyncio_logging.py
+    main()
@@ -0,0 +1,474 @@
+"""
+per-call overhead of `print` under lk-logger, with json baselines.
+
+usage:
+    python tests/benchmark.py
+    python tests/benchmark.py -k markup -n 2000
+    python tests/benchmark.py --save
+    python tests/benchmark.py --compare
+    #   `--save` and `--compare` take an optional path, default to -
+    #   `tests/benchmark_baseline.json`. a baseline is only meaningful on -
+    #   the machine that made it.
+
+metrics:
+    ns: the median of `--repeat` runs. each run prints `-n` messages and -
+        waits for the background printer to drain, so it is the full cost of -
+        a message, not only the caller side.
+    ns_spread: the interquartile range of the runs, relative to `ns`.
+    peak_bytes: the median peak of traced memory (see `tracemalloc`) during -
+        a single call, i.e. the transient allocations of a call.
+    net_blocks: memory blocks still allocated after a run, per call (see -
+        `sys.getallocatedblocks`). it is about 0 unless a cache keeps growing.
+
+sinks:
+    null: `os.devnull`. file: a temporary file. tty: a pseudo terminal (not -
+    available on windows), with colors enabled.
+
+note: `:e` (traceback) is not included, it renders a whole traceback panel -
+and costs milliseconds.
+
+a case is flagged if it is slower or uses more memory than the baseline by -
+more than a tolerance, and by more than a small absolute margin (to ignore -
+noise on very cheap cases). the tolerance of `ns` is `--threshold`, or 3 -
+times the measured spread (of the baseline or the current run) if that is -
+larger. a flagged case is measured once more, and is reported only if it -
+is still flagged. the exit code is 1 if any case is reported.
+
+some cases also have a budget relative to another case of the same run (see -
+`Case.budget`), which is checked with or without a baseline. e.g. a message -
+dropped by `min_verbosity` must cost less than a tenth of a printed one, and -
+a call from a muted module less than a builtin print.
+"""
+import gc
+import json
+import os
+import platform
+import sys
+import tracemalloc
+import typing as t
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from importlib import import_module
+from tempfile import TemporaryDirectory
+from tempfile import TemporaryFile
+from threading import Thread
+from time import perf_counter_ns
+from time import strftime
+
+from rich.color import ColorSystem
+
+import lk_logger
+from lk_logger.console import console
+from lk_logger.deflector import deflector
+from lk_logger.logger import logger
+from lk_logger.printer import std_print
+
+try:
+    import pty
+except ImportError:  # windows
+    pty = None
+
+lk_logger.setup(quiet=True)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__),
+                                'benchmark_baseline.json')
+
+
+class T:
+    Runner = t.Callable[[], None]
+    Factory = t.Callable[[int], Runner]
+    #   takes the number of calls, returns a function that makes them. -
+    #   preparations are done in the factory, out of the timing.
+    Result = t.Dict[str, float]  # {'ns': ..., 'peak_bytes': ..., ...}
+    Results = t.Dict[str, Result]  # {case name: result, ...}
+
+
+class Case(t.NamedTuple):
+    name: str
+    factory: T.Factory
+    config: t.Dict[str, t.Any] = {}  # see `lk_logger.update`.
+    sink: str = 'null'  # 'null', 'file' or 'tty'.
+    budget: t.Optional[t.Tuple[str, float]] = None
+    #   (another case, ratio). `ns` must not exceed the other case's `ns` -
+    #   times ratio. the other case must come first in `_get_cases`.
+
+
+# -----------------------------------------------------------------------------
+# cases
+
+_sink_file: t.Optional[t.TextIO] = None  # see `_use_sink`.
+_temp_dir: str = ''  # see `main`.
+_module_count = 0
+
+
+def _make_module(source: str) -> t.Any:
+    """
+    each module lives in its own directory, so muting one (which mutes its -
+    directory) doesn't affect the others.
+    """
+    global _module_count
+    _module_count += 1
+    name = f'_bench_{_module_count}'
+    dir_ = f'{_temp_dir}/{name}'
+    os.mkdir(dir_)
+    with open(f'{dir_}/{name}.py', 'w') as f:
+        f.write(source)
+    sys.path.insert(0, dir_)
+    try:
+        return import_module(name)
+    finally:
+        sys.path.remove(dir_)
+
+
+def builtin_print(n: int) -> T.Runner:
+    def run() -> None:
+        file = _sink_file
+        for i in range(n):
+            std_print('hello', i, file=file)
+    
+    return run
+
+
+def plain(n: int) -> T.Runner:
+    def run() -> None:
+        for i in range(n):
+            print('hello', i)
+    
+    return run
+
+
+def cold_call_sites(n: int) -> T.Runner:
+    """
+    every call comes from a new code object in a new file, nothing is -
+    cached yet.
+    """
+    module = _make_module('\n'.join(
+        f'def f{i}(i):\n    print("hello", i)\n' for i in range(n)
+    ))
+    funcs = [getattr(module, f'f{i}') for i in range(n)]
+    
+    def run() -> None:
+        for i, f in enumerate(funcs):
+            f(i)
+    
+    return run
+
+
+def varnames(n: int) -> T.Runner:
+    def run() -> None:
+        a, b = 'hello', 1
+        for i in range(n):
+            print(a, b, i)
+    
+    return run
+
+
+def markup(mark: str, *args: t.Any) -> T.Factory:
+    def factory(n: int) -> T.Runner:
+        def run() -> None:
+            for _ in range(n):
+                print(mark, *args)
+        
+        return run
+    
+    return factory
+
+
+def rich_object(n: int) -> T.Runner:
+    from rich.table import Table
+    table = Table('name', 'value')
+    for i in range(3):
+        table.add_row(f'item {i}', str(i))
+    return markup(':r1', table)(n)
+
+
+def routed(print_func: t.Optional[t.Callable]) -> T.Factory:
+    """
+    calls from a muted (`print_func` is None) or deflected module.
+    """
+    def factory(n: int) -> T.Runner:
+        module = _make_module(
+            'def spam(n):\n'
+            '    for i in range(n):\n'
+            '        print("hello", i)\n'
+        )
+        if print_func is None:
+            lk_logger.mute(module)
+        else:
+            deflector.add(module, print_func)
+        
+        def run() -> None:
+            module.spam(n)
+        
+        return run
+    
+    return factory
+
+
+def _get_cases() -> t.List[Case]:
+    out = [
+        Case('builtin_print', builtin_print),
+        Case('plain', plain),
+        Case('plain_main_thread', plain, {'subthreaded': False}),
+        Case('cold_call_sites', cold_call_sites),
+        Case('varnames_off', varnames),
+        Case('varnames_on', varnames, {'show_varnames': True}),
+        Case('dropped', markup(':v0', 'hello'), {'min_verbosity': 5},
+             budget=('plain', 0.1)),
+        Case('rich_object', rich_object),
+        Case('muted', routed(None), budget=('builtin_print', 1.0)),
+        Case('deflected', routed(lambda *_, **__: None)),
+    ]
+    for mark, args in (
+        (':d', ()),
+        (':f', ('hello',)),
+        (':i', ('hello',)),
+        (':l', ({'a': 1, 'b': [1, 2, 3]},)),
+        (':p', ('hello',)),
+        (':r', ('[red]hello[/]',)),
+        (':s', ('hello',)),
+        (':t', ('hello',)),
+        (':v4', ('hello',)),
+    ):
+        out.append(Case('markup' + mark, markup(mark, *args)))
+    sinks = ('file', 'tty') if pty else ('file',)
+    for sink in sinks:
+        out.append(Case(f'builtin_print@{sink}', builtin_print, sink=sink))
+        out.append(Case(f'plain@{sink}', plain, sink=sink))
+    return out
+
+
+# -----------------------------------------------------------------------------
+# measuring
+
+@contextmanager
+def _use_sink(kind: str) -> t.Iterator[None]:
+    global _sink_file
+    _drain()  # the pending messages go to the current sink.
+    backup = console.file, console._color_system
+    reader = None
+    if kind == 'null':
+        file = open(os.devnull, 'w')
+    elif kind == 'file':
+        file = TemporaryFile('w+')
+    else:
+        master, slave = pty.openpty()
+        file = open(slave, 'w')
+        
+        def drain() -> None:
+            try:
+                while os.read(master, 65536):
+                    pass
+            except OSError:  # the slave is closed.
+                pass
+        
+        # a full pty buffer would block the writer.
+        reader = Thread(target=drain, daemon=True)
+        reader.start()
+        # rich decides the color system when the console is created, on a -
+        # headless machine it is None (plain text).
+        # noinspection PyProtectedMember
+        console._color_system = (
+            console._detect_color_system() or ColorSystem.TRUECOLOR
+        )
+    console.file = _sink_file = file
+    try:
+        yield
+    finally:
+        console.file, console._color_system = backup
+        _sink_file = None
+        file.close()
+        if reader:
+            os.close(master)
+            reader.join()
+
+
+@contextmanager
+def _use_config(config: t.Dict[str, t.Any]) -> t.Iterator[None]:
+    # noinspection PyProtectedMember
+    backup = {k: getattr(logger._config, k) for k in config}
+    lk_logger.update(**config)
+    try:
+        yield
+    finally:
+        lk_logger.update(**backup)
+
+
+def _drain() -> None:
+    if hasattr(logger, '_wait_drained'):
+        # noinspection PyProtectedMember
+        logger._wait_drained()
+
+
+def measure(case: Case, n: int, repeat: int, samples: int = 50) -> T.Result:
+    with _use_sink(case.sink), _use_config(case.config):
+        case.factory(min(n, 100))()  # warm up.
+        _drain()
+        
+        timings = []
+        net_blocks = 0.0
+        for _ in range(repeat):
+            run = case.factory(n)
+            gc.collect()
+            gc.disable()
+            blocks = sys.getallocatedblocks()
+            start = perf_counter_ns()
+            run()
+            _drain()
+            timings.append((perf_counter_ns() - start) / n)
+            gc.enable()
+            gc.collect()
+            net_blocks = (sys.getallocatedblocks() - blocks) / n
+        
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(samples):
+                run = case.factory(1)
+                _drain()
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                run()
+                _drain()
+                peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        finally:
+            tracemalloc.stop()
+        peaks.sort()
+    
+    timings.sort()
+    median = timings[len(timings) // 2]
+    spread = timings[len(timings) * 3 // 4] - timings[len(timings) // 4]
+    return {
+        'ns'        : round(median, 1),
+        'ns_spread' : round(spread / median, 3),
+        'peak_bytes': peaks[len(peaks) // 2],
+        'net_blocks': round(net_blocks, 2),
+    }
+
+
+def compare(
+    result: T.Result,
+    base: t.Optional[T.Result],
+    threshold: float,
+    budget: t.Optional[t.Tuple[str, float]] = None,
+    results: T.Results = None,
+) -> t.List[str]:
+    """
+    params:
+        base: the baseline of the case, or None.
+        budget: see `Case.budget`. it is skipped if the other case is not in -
+            `results` (e.g. filtered out by `--keyword`).
+    returns: a list of flags, empty if nothing is regressed.
+    """
+    out = []
+    if budget and budget[0] in (results or {}):
+        name, ratio = budget
+        if result['ns'] > results[name]['ns'] * ratio:
+            out.append(f'ns > {ratio:g}x {name}')
+    if base is None:
+        return out
+    ns_tolerance = max(
+        threshold, 3 * result['ns_spread'], 3 * base.get('ns_spread', 0)
+    )
+    # (metric, tolerance, absolute margin)
+    for key, tolerance, margin in (
+        ('ns', ns_tolerance, 100),
+        ('peak_bytes', threshold, 256),
+    ):
+        if key in base and result[key] > base[key] * (1 + tolerance) and \
+                result[key] - base[key] > margin:
+            out.append(f'{key} +{result[key] / base[key] - 1:.0%}')
+    if 'net_blocks' in base and result['net_blocks'] - base['net_blocks'] > 1:
+        out.append('net_blocks +{:.1f}'.format(
+            result['net_blocks'] - base['net_blocks']
+        ))
+    return out
+
+
+# -----------------------------------------------------------------------------
+# entry
+
+def main(
+    n: int = 1000,
+    repeat: int = 7,
+    keyword: str = '',
+    save: str = '',
+    baseline: str = '',
+    threshold: float = 0.25,
+) -> int:
+    """
+    returns: the exit code, 1 if any case is regressed.
+    """
+    global _temp_dir
+    base = {}
+    if baseline:
+        with open(baseline) as f:
+            base = json.load(f)['results']
+    
+    results: T.Results = {}
+    regressed = False
+    print(':s1', '{:<24} {:>12} {:>7} {:>12} {:>12}  {}'.format(
+        'case', 'ns/call', 'spread', 'peak bytes', 'net blocks', 'vs baseline'
+    ))
+    with TemporaryDirectory() as _temp_dir:
+        for case in _get_cases():
+            if keyword not in case.name:
+                continue
+            result = results[case.name] = measure(case, n, repeat)
+            args = (base.get(case.name), threshold, case.budget, results)
+            flags = compare(result, *args)
+            if flags:
+                # confirm it, a single run may hit a busy moment.
+                result = results[case.name] = measure(case, n, repeat)
+                flags = compare(result, *args)
+            regressed = regressed or bool(flags)
+            note = ''
+            if case.name in base:
+                note = '{:.2f}x'.format(result['ns'] / base[case.name]['ns'])
+            if flags:
+                note += '  REGRESSED: ' + ', '.join(flags)
+            print(':s1', '{:<24} {:>12,.0f} {:>7.0%} {:>12,} {:>12.2f}  {}'
+                  .format(case.name, result['ns'], result['ns_spread'],
+                          result['peak_bytes'], result['net_blocks'], note))
+        deflector.clear_routes()
+    
+    if save:
+        with open(save, 'w') as f:
+            json.dump({
+                'meta'   : {
+                    'date'     : strftime('%Y-%m-%d %H:%M:%S'),
+                    'lk_logger': lk_logger.__version__,
+                    'n'        : n,
+                    'platform' : platform.platform(),
+                    'python'   : platform.python_version(),
+                    'repeat'   : repeat,
+                },
+                'results': results,
+            }, f, indent=2)
+        print(':s1', f'baseline saved to {save}')
+    if regressed:
+        print(':s1', f'regressed (threshold: {threshold:.0%})')
+    return int(regressed)
+
+
+if __name__ == '__main__':
+    # pox tests/benchmark.py
+    # pox tests/benchmark.py --save
+    # pox tests/benchmark.py --compare
+    parser = ArgumentParser(description='per-call overhead of lk-logger.')
+    parser.add_argument('-n', type=int, default=1000,
+                        help='calls per run.')
+    parser.add_argument('-r', '--repeat', type=int, default=7,
+                        help='runs per case, the median is taken.')
+    parser.add_argument('-k', '--keyword', default='',
+                        help='only run the cases whose name contains it.')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE,
+                        default='', help='save the results as a baseline.')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE,
+                        default='', help='compare with a baseline.')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='the tolerated slowdown, 0.25 means 25%%. '
+                             'a larger measured spread overrides it.')
+    args = parser.parse_args()
+    sys.exit(main(args.n, args.repeat, args.keyword, args.save, args.compare,
+                  args.threshold))
@@ -0,0 +1,34 @@
+"""
+simulate a slow terminal by a slow parallel printer, and see how each -
+overflow policy behaves.
+"""
+from time import sleep
+from time import time
+
+import lk_logger
+from lk_logger import parallel_printing
+
+lk_logger.setup(queue_size=20)
+
+
+def _slow_terminal(_: str) -> None:
+    sleep(1e-3)
+
+
+def flood(policy: str, count: int = 500) -> None:
+    lk_logger.update(queue_overflow=policy)
+    with parallel_printing(_slow_terminal):
+        start = time()
+        for i in range(count):
+            print(policy, i)
+        duration = time() - start
+        # the flush reports how many messages were dropped.
+        print(':f', 'producer took {:.3f}s'.format(duration))
+
+
+if __name__ == '__main__':
+    # pox tests/bounded_queue.py
+    flood('block')
+    flood('drop_newest')
+    flood('drop_oldest')
+    flood('sample')
@@ -0,0 +1,77 @@
+"""
+capture messages to a binary file without rendering, then render them.
+
+the same can be done from the command line:
+    py -m lk_logger render <file>
+"""
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import lk_logger
+from lk_logger.capture import read_records
+from lk_logger.capture import render
+
+lk_logger.setup(show_varnames=True)
+
+
+def report(msg: str) -> None:
+    print(':p', msg)  # shows the caller's source.
+
+
+def report_wrapper(msg: str) -> None:
+    with lk_logger.elevate_caller_stack():
+        report(msg)
+
+
+def produce(n: int = 3) -> None:
+    a, b = 1, 'two'
+    print(a, b, 3.0, None, [a, b])
+    for i in range(n):
+        print(':i', 'loop', i)
+    print(':v4', 'done')
+    report_wrapper('from produce')
+    print(':l', {'key': (a, b)})  # needs the live object, not captured.
+    print(*range(300), sep=' ')  # more than 255 args.
+
+
+def speed(file: str, n: int = 10000) -> float:
+    start = perf_counter()
+    for i in range(n):
+        print('hello', i)
+    return (perf_counter() - start) / n * 1e6
+
+
+def main() -> None:
+    with TemporaryDirectory() as dir_:
+        file = f'{dir_}/capture.lkb'
+        lk_logger.update(capture_file=file)
+        produce()
+        lk_logger.update(capture_file=None)  # closes the file.
+        
+        records = tuple(read_records(file))
+        assert len(records) == 7
+        assert records[0][2] == (1, 'two', 3.0, None, '[1, \'two\']')
+        assert records[4][2] == (':v4', 'done')
+        # the frame that `:p` refers to is the wrapper's caller.
+        assert records[5][1].parent.funcname == 'produce'
+        assert records[-1][2] == tuple(range(300))
+        assert records[-1][3] == {'sep': ' '}
+        assert records[1][1] is records[2][1]  # frames are shared.
+        print(':i0')
+        print(':d', 'rendered from {} ({} bytes)'.format(
+            os.path.basename(file), os.path.getsize(file)
+        ))
+        render(file)
+        
+        lk_logger.update(capture_file=file)
+        us = speed(file)
+        lk_logger.update(capture_file=None)
+        print(':v4', 'capture: {:.2f}us per call, file size: {} bytes'.format(
+            us, os.path.getsize(file)
+        ))
+
+
+if __name__ == '__main__':
+    # pox tests/capture_and_render.py
+    main()
@@ -0,0 +1,73 @@
+"""
+external library roots follow `sys.path` changes at runtime, including zip -
+archives, and packages loaded from outside `sys.path` (editable installs).
+"""
+import os
+import sys
+import zipfile
+from importlib import import_module
+from importlib.util import module_from_spec
+from importlib.util import spec_from_file_location
+from tempfile import TemporaryDirectory
+
+from lk_logger.path_helper import normpath
+from lk_logger.path_helper import path_helper
+
+
+def _write(path: str, text: str = '') -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+    return normpath(path)
+
+
+def plugin_dir(root: str) -> None:
+    file = _write(f'{root}/plugins/myplugin/core.py')
+    assert path_helper.get_relpath(file) == '[unknown]/myplugin/core.py'
+    sys.path.append(f'{root}/plugins')  # e.g. `site.addsitedir`.
+    assert path_helper.get_relpath(file) == '[myplugin]/core.py'
+    assert path_helper.get_filename(file) == '[plugins]/core.py'
+    sys.path.remove(f'{root}/plugins')
+    assert path_helper.get_relpath(file) == '[unknown]/myplugin/core.py'
+
+
+def zipapp(root: str) -> None:
+    with zipfile.ZipFile(f'{root}/app.pyz', 'w') as z:
+        z.writestr('zmod.py', 'x = 1\n')
+        z.writestr('zpkg/__init__.py', '')
+        z.writestr('zpkg/util.py', '')
+    sys.path.insert(0, f'{root}/app.pyz')
+    try:
+        zmod = import_module('zmod')
+        util = import_module('zpkg.util')
+        assert path_helper.get_relpath(normpath(zmod.__file__)) == \
+               '[app]/zmod.py'
+        assert path_helper.get_relpath(normpath(util.__file__)) == \
+               '[zpkg]/util.py'
+    finally:
+        sys.path.remove(f'{root}/app.pyz')
+
+
+def editable(root: str) -> None:
+    # the package is found by a custom finder, its parent dir is not in -
+    # `sys.path`.
+    init = _write(f'{root}/src/edpkg/__init__.py')
+    file = _write(f'{root}/src/edpkg/sub/thing.py')
+    spec = spec_from_file_location(
+        'edpkg', init, submodule_search_locations=[f'{root}/src/edpkg']
+    )
+    sys.modules['edpkg'] = module_from_spec(spec)
+    try:
+        assert path_helper.get_relpath(file) == '[edpkg]/sub/thing.py'
+        assert path_helper.get_filename(file) == '[edpkg]/thing.py'
+    finally:
+        sys.modules.pop('edpkg')
+
+
+if __name__ == '__main__':
+    # pox tests/external_libs.py
+    with TemporaryDirectory() as d:
+        plugin_dir(d)
+        zipapp(d)
+        editable(d)
+    print('done')
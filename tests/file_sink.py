@@ -0,0 +1,59 @@
+"""
+write messages to json lines files alongside the console, then read them -
+back.
+"""
+import json
+import os
+from tempfile import TemporaryDirectory
+
+import lk_logger
+
+lk_logger.setup(show_funcname=True)
+
+
+def _read(file: str) -> list:
+    with open(file, encoding='utf-8') as f:
+        return [json.loads(x) for x in f]
+
+
+def basic(dir_: str) -> None:
+    file = f'{dir_}/basic.jsonl'
+    with lk_logger.file_sink(file):
+        print('hello', 'world')
+        print(':v4', 'done')
+        print(':v8', 'some error happens')
+        print(':v9', 'fatal')
+    records = _read(file)
+    assert len(records) == 4
+    assert records[0]['message'] == 'hello;   world'
+    assert records[0]['level'] is None
+    assert records[1]['level'] == 'info' and records[1]['verbosity'] == 4
+    assert records[2]['level'] == 'error'
+    assert records[2]['function'] == 'basic'
+    assert records[2]['file'] == os.path.abspath(__file__).replace('\\', '/')
+    assert records[3]['level'] == 'error' and records[3]['verbosity'] == 9
+    print(':v4', records[2])
+
+
+def rotation(dir_: str) -> None:
+    file = f'{dir_}/rotation.jsonl'
+    with lk_logger.file_sink(
+        file, buffer_size=10, max_bytes=2000, backup_count=2
+    ):
+        for i in range(100):
+            print('message', i)
+    files = sorted(os.listdir(dir_))
+    print(files)
+    assert files == ['rotation.jsonl', 'rotation.jsonl.1', 'rotation.jsonl.2']
+    # the newest records are in the current file.
+    assert _read(file)[-1]['message'] == 'message;   99'
+    for f in files:
+        assert os.path.getsize(f'{dir_}/{f}') <= 2000
+
+
+if __name__ == '__main__':
+    # pox tests/file_sink.py
+    with TemporaryDirectory() as d:
+        basic(d)
+    with TemporaryDirectory() as d:
+        rotation(d)
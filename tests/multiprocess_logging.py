@@ -0,0 +1,33 @@
+"""
+prints from 16 worker processes are rendered by the main process, one line -
+at a time, with sourcemap and varnames as usual.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import lk_logger
+
+lk_logger.setup(show_varnames=True)
+
+
+def work(n: int) -> int:
+    pid = os.getpid()
+    square = n * n
+    print(':i', pid, n, square)
+    if n % 5 == 0:
+        print(':v4', 'milestone', n)
+    return square
+
+
+def main() -> None:
+    with lk_logger.process_sink() as queue:
+        with ProcessPoolExecutor(
+            16, initializer=lk_logger.setup_worker, initargs=(queue,)
+        ) as pool:
+            results = list(pool.map(work, range(64)))
+    print(sum(results))
+
+
+if __name__ == '__main__':
+    # pox tests/multiprocess_logging.py
+    main()
@@ -0,0 +1,90 @@
+"""
+many threads logging at the same time.
+
+with `multithread=True`, each thread appends to its own buffer without -
+locking, and the background thread merges the buffers in call order.
+"""
+import os
+import re
+from threading import Barrier
+from threading import Thread
+from time import perf_counter
+
+import lk_logger
+from lk_logger import parallel_printing
+from lk_logger.console import console
+
+lk_logger.setup(quiet=True)
+
+
+def run(threads: int = 32, count: int = 500, indexed: bool = True) -> float:
+    """
+    params:
+        indexed: add a global index (`:i3`) to each message. note that -
+            styled messages are much slower than plain ones.
+    returns: messages per second.
+    """
+    barrier = Barrier(threads + 1)
+    
+    def work(tid: int) -> None:
+        barrier.wait()
+        for i in range(count):
+            if indexed:
+                print(':i3', tid, i)
+            else:
+                print(tid, i)
+    
+    workers = [Thread(target=work, args=(x,)) for x in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = perf_counter()
+    for w in workers:
+        w.join()
+    print(':fs')  # wait for the background thread to drain.
+    return threads * count / (perf_counter() - start)
+
+
+def check(threads: int = 32, count: int = 100) -> None:
+    print(':fi0')  # reset the global index.
+    lines = []
+    with parallel_printing(lines.append, inherit=False):
+        run(threads, count)
+    lines = [x for x in lines if x]  # the flush mark prints an empty line.
+    assert len(lines) == threads * count, len(lines)
+    
+    last = {}
+    indexes = []
+    for line in lines:
+        index, tid, i = map(int, re.findall(r'\d+', line))
+        # the order of each thread is kept.
+        assert i == last.get(tid, -1) + 1, (tid, i)
+        last[tid] = i
+        indexes.append(index)
+    # the global counter is not corrupted (no duplicates or gaps).
+    #   note: the index is taken when the message is composed, a thread may -
+    #   be preempted before it queues the message, so the printed order of -
+    #   indexes is not strictly ascending.
+    assert sorted(indexes) == list(range(1, threads * count + 1))
+
+
+def main() -> None:
+    backup = console.file
+    result = {}
+    with open(os.devnull, 'w') as f:
+        console.file = f
+        try:
+            for multithread in (False, True):
+                lk_logger.update(multithread=multithread)
+                check()
+                result[multithread] = run(count=1000, indexed=False)
+        finally:
+            console.file = backup
+            lk_logger.update(multithread=False)
+    print(':v4', 'locked queue: {:,.0f} msg/s, per-thread buffers: '
+                 '{:,.0f} msg/s'.format(result[False], result[True]))
+
+
+if __name__ == '__main__':
+    # pox tests/multithread_logging.py
+    main()
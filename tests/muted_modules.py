@@ -0,0 +1,72 @@
+"""
+muted or deflected modules are routed once per code object, later calls -
+skip resolving the path.
+"""
+import sys
+from importlib import import_module
+from tempfile import TemporaryDirectory
+from timeit import timeit
+
+import lk_logger
+from lk_logger import parallel_printing
+from lk_logger.deflector import deflector
+
+lk_logger.setup(quiet=True)
+
+_source = '''
+def spam(n):
+    for i in range(n):
+        print('noise', i)
+'''
+
+
+def _make_module(dir_: str, name: str):
+    with open(f'{dir_}/{name}.py', 'w') as f:
+        f.write(_source)
+    return import_module(name)
+
+
+def main(dir_: str) -> None:
+    sys.path.insert(0, dir_)
+    # the same source, so their code objects compare equal, but they must -
+    # be routed separately.
+    noisy = _make_module(dir_, 'noisy')
+    talky = _make_module(dir_, 'talky')
+    
+    lines = []
+    with parallel_printing(lines.append, inherit=False):
+        noisy.spam(1)  # printed, then muted below.
+        lk_logger.mute(noisy)
+        noisy.spam(3)
+        print(':fs')
+    assert lines == ['noise;   0'], lines
+    
+    deflected = []
+    deflector.add(talky, lambda *args, **_: deflected.append(args))
+    talky.spam(2)
+    assert deflected == [('noise', 0), ('noise', 1)]
+    
+    # a routed module still obeys the global switches.
+    with lk_logger.mute:
+        talky.spam(1)
+    lk_logger.disable()
+    talky.spam(1)
+    lk_logger.enable()
+    assert len(deflected) == 2, deflected
+    talky.spam(1)
+    assert len(deflected) == 3, deflected
+    assert 'print' not in vars(noisy) and 'print' not in vars(talky)
+    
+    n = 100_000
+    muted = timeit(lambda: noisy.spam(100), number=n // 100) / n * 1e9
+    lk_logger.disable()
+    disabled = timeit(lambda: noisy.spam(100), number=n // 100) / n * 1e9
+    lk_logger.enable()
+    print(':v4', 'muted: {:.0f}ns per call, disabled: {:.0f}ns per call'
+          .format(muted, disabled))
+
+
+if __name__ == '__main__':
+    # pox tests/muted_modules.py
+    with TemporaryDirectory() as d:
+        main(d)
@@ -0,0 +1,62 @@
+"""
+deflected paths, min verbosities and library roots share one prefix trie. -
+a lookup matches whole path components, the deepest prefix wins.
+"""
+from timeit import timeit
+
+from lk_logger.path_helper import PathRouter
+from lk_logger.path_helper import path_router
+
+
+def matching() -> None:
+    router = PathRouter()
+    router.add('print', '/a/b', 'b')
+    router.add('print', '/a/b/c', 'c')
+    router.add('verbosity', '/a', 5)
+    
+    assert router.match('/a/b/c/d.py') == {
+        'print': ('/a/b/c', 'c'), 'verbosity': ('/a', 5)
+    }
+    assert router.match('/a/b/x.py')['print'] == ('/a/b', 'b')
+    # '/a/b' is not a prefix of '/a/bc'.
+    assert 'print' not in router.match('/a/bc/x.py')
+    assert router.match('/x/y.py') == {}
+    assert router.match('<stdin>') == {}
+    
+    # the cache is cleared when a rule changes.
+    router.remove('print', '/a/b/c')
+    assert router.match('/a/b/c/d.py')['print'] == ('/a/b', 'b')
+    router.add('print', '/', 'root')
+    assert router.match('/x/y.py')['print'] == ('/', 'root')
+
+
+def speed(roots: int = 200) -> None:
+    """
+    compare with the former linear scan of `str.startswith`, both without -
+    the lru cache.
+    """
+    router = PathRouter()
+    scan = {}
+    for i in range(roots):
+        router.add('print', f'/site-packages/lib{i}', i)
+        scan[f'/site-packages/lib{i}'] = i
+    path = '/home/user/project/src/module.py'  # not matched, the worst case.
+    
+    def linear() -> None:
+        for root, _ in scan.items():
+            if path.startswith(root):
+                break
+    
+    n = 10_000
+    trie = timeit(lambda: router._match(path), number=n) / n * 1e9
+    flat = timeit(linear, number=n) / n * 1e9
+    cached = timeit(lambda: router.match(path), number=n) / n * 1e9
+    print('{} roots: trie {:.0f}ns, linear scan {:.0f}ns, lru hit {:.0f}ns'
+          .format(roots, trie, flat, cached))
+
+
+if __name__ == '__main__':
+    # pox tests/path_router.py
+    matching()
+    speed()
+    print(path_router.match.cache_info())
@@ -0,0 +1,22 @@
+"""
+keep only a part of messages from hot loops. the counts are reported at exit.
+"""
+import lk_logger
+
+lk_logger.setup(sampling=1000, sampling_markups={':v0': 0.001})
+
+
+def main(n: int = 10000) -> None:
+    for i in range(n):
+        print('1 in 1000', i)
+    for i in range(n):
+        print(':v0', 'about 1 in 1000', i)
+    for i in range(3):
+        # each call site has its own counter.
+        print('first call of the site', i)
+        break
+
+
+if __name__ == '__main__':
+    # pox tests/sampled_printing.py
+    main()
@@ -0,0 +1,76 @@
+"""
+compare the first `print` cost of a big module in a fresh process, with cold -
+and warm sourcemap cache, and with 'file' and 'line' indexing modes.
+"""
+import os
+import subprocess as sp
+import sys
+from tempfile import TemporaryDirectory
+from textwrap import dedent
+from time import perf_counter
+
+import lk_logger
+from lk_logger.sourcemap import sourcemap
+
+lk_logger.setup()
+
+_child_code = dedent('''
+    import sys
+    from time import perf_counter
+    import lk_logger
+    lk_logger.setup(
+        quiet=True, show_varnames=True, sourcemap_indexing={indexing!r}
+    )
+    sys.path.insert(0, {tmpdir!r})
+    import big_module
+    start = perf_counter()
+    big_module.main()
+    lk_logger.bprint('{{:.3f}}'.format((perf_counter() - start) * 1000))
+''')
+
+
+def make_big_module(dir_: str, funcs: int = 1000) -> str:
+    file = f'{dir_}/big_module.py'
+    with open(file, 'w') as f:
+        for i in range(funcs):  # 5 lines each.
+            f.write(f'def func_{i}(a, b):\n')
+            f.write(f'    c = a + b * {i}\n')
+            f.write(f'    return [c, {{"key": (a, b)}}, "text {i}"]\n')
+            f.write('\n\n')
+        f.write('def main():\n    a, b = 1, 2\n    print(a, b, a + b)\n')
+    return file
+
+
+def run_child(tmpdir: str, indexing: str = 'file') -> tuple:
+    start = perf_counter()
+    out = sp.run(
+        (
+            sys.executable, '-c',
+            _child_code.format(tmpdir=tmpdir, indexing=indexing)
+        ),
+        stdout=sp.PIPE, text=True, check=True,
+        env={**os.environ, 'PYTHONPATH': os.getcwd()},
+    ).stdout
+    total = (perf_counter() - start) * 1000
+    first_print = float(out.strip().splitlines()[-1])
+    return first_print, total
+
+
+def main() -> None:
+    with TemporaryDirectory() as tmpdir:
+        file = make_big_module(tmpdir)  # a new path, so it's a cold start.
+        cold = run_child(tmpdir)
+        warm = run_child(tmpdir)
+        sourcemap.persistent_cache.discard(file)
+        cold_line = run_child(tmpdir, 'line')
+        sourcemap.persistent_cache.discard(file)
+        print(':d', 'first print of a 5000-line module (ms)')
+        print('cold: first print = {:.3f}, process = {:.1f}'.format(*cold))
+        print('warm: first print = {:.3f}, process = {:.1f}'.format(*warm))
+        print('cold, line indexing: first print = {:.3f}, process = {:.1f}'
+              .format(*cold_line))
+
+
+if __name__ == '__main__':
+    # pox tests/sourcemap_cache.py
+    main()
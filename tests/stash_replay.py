@@ -0,0 +1,66 @@
+"""
+`lk_logger.delay` holds messages and replays them at once when leaving. -
+`track` and `spinner` are built on it.
+"""
+import os
+from time import perf_counter
+
+import lk_logger
+from lk_logger import parallel_printing
+from lk_logger import track
+from lk_logger.console import console
+
+lk_logger.setup(quiet=True)
+
+
+def nesting() -> None:
+    lines = []
+    with parallel_printing(lines.append, inherit=False):
+        print('before')
+        print(':f')  # the console sees it before the stash starts.
+        with lk_logger.delay():
+            print('a')
+            with lk_logger.delay():
+                print('b')
+            # only the outermost one replays.
+            assert lines == ['before', ''], lines
+            print('c')
+        print('after')
+        print(':fs')
+    assert lines == ['before', '', 'a', 'b', 'c', 'after'], lines
+
+
+def tracked_loop(count: int = 200_000) -> None:
+    """
+    the loop body prints every item, the messages are held while the -
+    progress bar is shown. it should cost about the same as printing them -
+    directly.
+    """
+    lines = []
+    backup = console.file
+    with open(os.devnull, 'w') as f:
+        console.file = f
+        try:
+            with parallel_printing(lines.append, inherit=False):
+                start = perf_counter()
+                for i in range(count):
+                    print(i)
+                print(':fs')
+                direct = perf_counter() - start
+                
+                start = perf_counter()
+                for i in track(range(count)):
+                    print(i)
+                looped = perf_counter() - start
+        finally:
+            console.file = backup
+    assert len(lines) == count * 2, len(lines)
+    assert lines[-1] == str(count - 1)
+    print(':v4', 'direct: {:.2f}s, in track: {:.2f}s (including the replay)'
+          .format(direct, looped))
+
+
+if __name__ == '__main__':
+    # pox tests/stash_replay.py
+    nesting()
+    tracked_loop()
@@ -0,0 +1,174 @@
+"""
+shared correctness corpus for the sourcemap backends (see `LoggingConfig -
+.sourcemap_backend`), and a speed/memory benchmark of them.
+
+usage:
+    pytest tests/test_sourcemap_backends.py
+    # benchmark:
+    pox tests/test_sourcemap_backends.py
+"""
+import os
+import tracemalloc
+import typing as t
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import lk_logger
+from lk_logger.sourcemap import SourceMap
+
+# (source, expected varnames). both backends must agree on these.
+CORPUS = (
+    ('print(a, b, c)', ('a', 'b', 'c')),
+    ('print(a, b, c,)', ('a', 'b', 'c')),
+    ("print('hello', a, b'x', f'{a}')", ('', 'a', '', '')),
+    ('print(1, -2.5, a + b, 1e10)', ('', '', 'a + b', '1e10')),
+    ('print(a, sep=", ", end="")', ('a',)),
+    ('print((a, b), [c], {d: e})', ('', '', '')),
+    ('print(x := 12, y)', ('x', 'y')),
+    ('print(a.b[0], obj.method(1, 2))', ('a.b[0]', 'obj.method(1, 2)')),
+    (
+        "print(get('https://example.com/some/long/path'), x)",
+        ('get("...")', 'x'),
+    ),
+    ('print(\n    a,\n    b,\n)', ('a', 'b')),
+    ('print(a if a else b, not c)', ('a if a else b', 'not c')),
+    ('print(*args)', ('*args',)),
+    ('print()', ()),
+    ('print(":v3", a)', ('', 'a')),
+    ('x = 1', ()),  # not a print call.
+)
+
+# (source, expected by 'scanner', expected by 'ast').
+DIVERGENT = (
+    ('print(lambda x: x, a)', (), ('', 'a')),
+    ('if a: print(a)', (), ('a',)),
+    ('logger.log(a, b)', (), ('a', 'b')),
+    ('y = math.log(a); print(b, c)', (), ('b', 'c')),
+    ('print((a))', ('',), ('a',)),
+    ('print(\n    a,\n    b,  # comment\n)', (), ('a', 'b')),
+)
+
+
+def _index(
+    backend: str, indexing: str, sources: t.Sequence[str]
+) -> t.List[t.Tuple[str, ...]]:
+    """
+    write sources into a temp file (one after another), then look up the -
+    varnames at the first line of each source.
+    """
+    linenos = []
+    code = ''
+    for src in sources:
+        linenos.append(code.count('\n') + 1)
+        code += src + '\n'
+    
+    sourcemap = SourceMap()
+    sourcemap.backend = backend
+    sourcemap.indexing = indexing
+    sourcemap.persistent_cache.enabled = False
+    
+    with TemporaryDirectory() as dir_:
+        file = f'{dir_}/corpus.py'
+        with open(file, 'w') as f:
+            f.write(code)
+        return [sourcemap.get_varnames(file, x) for x in linenos]
+
+
+def _check(backend: str, indexing: str) -> None:
+    sources, expected = zip(*CORPUS)
+    assert _index(backend, indexing, sources) == list(expected)
+    sources, *expected = zip(*DIVERGENT)
+    expected = expected[0] if backend == 'scanner' else expected[1]
+    assert _index(backend, indexing, sources) == list(expected)
+
+
+def test_scanner_file_mode():
+    _check('scanner', 'file')
+
+
+def test_scanner_line_mode():
+    _check('scanner', 'line')
+
+
+def test_ast_file_mode():
+    _check('ast', 'file')
+
+
+def test_ast_line_mode():
+    _check('ast', 'line')
+
+
+def test_switch_backend():
+    """
+    files indexed by the former backend are indexed again after a switch.
+    """
+    from lk_logger.sourcemap import sourcemap
+    backup = lk_logger.logger.config
+    lk_logger.update(sourcemap_backend='scanner', sourcemap_cache=False)
+    try:
+        with TemporaryDirectory() as dir_:
+            file = f'{dir_}/switch.py'
+            with open(file, 'w') as f:
+                f.write('if a: print(a)\n')
+            assert sourcemap.get_varnames(file, 1) == ()
+            lk_logger.update(sourcemap_backend='ast')
+            assert sourcemap.get_varnames(file, 1) == ('a',)
+    finally:
+        lk_logger.update(**backup)
+
+
+def benchmark(repeat: int = 3) -> None:
+    """
+    index every module of lk_logger itself, plus a generated module with -
+    many print calls.
+    """
+    files = []
+    root = os.path.dirname(lk_logger.__file__)
+    for dirpath, _, filenames in os.walk(root):
+        files.extend(
+            f'{dirpath}/{x}' for x in filenames if x.endswith('.py')
+        )
+    
+    with TemporaryDirectory() as dir_:
+        file = f'{dir_}/many_prints.py'
+        with open(file, 'w') as f:
+            for i in range(300):
+                f.write(f'def func_{i}(a, b):\n')
+                f.write(f'    print(a, b, a + b, "text {i}", x := [a, b])\n')
+                f.write(f'    print(obj.method(a, "{i}"), sep=", ")\n\n\n')
+        files.append(file)
+        
+        for backend in ('scanner', 'ast'):
+            times = []
+            for _ in range(repeat):
+                sourcemap = SourceMap()
+                sourcemap.backend = backend
+                sourcemap.persistent_cache.enabled = False
+                start = perf_counter()
+                for f in files:
+                    sourcemap.get_varnames(f, 1)
+                times.append(perf_counter() - start)
+            
+            sourcemap = SourceMap()
+            sourcemap.backend = backend
+            sourcemap.persistent_cache.enabled = False
+            tracemalloc.start()
+            for f in files:
+                sourcemap.get_varnames(f, 1)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            print(':i', '{}: {} files, best {:.1f} ms, peak {:.2f} MB'.format(
+                backend, len(files), min(times) * 1000, peak / 1024 / 1024
+            ))
+
+
+if __name__ == '__main__':
+    # pox tests/test_sourcemap_backends.py
+    lk_logger.setup()
+    for backend in ('scanner', 'ast'):
+        for indexing in ('file', 'line'):
+            _check(backend, indexing)
+    test_switch_backend()
+    print(':v4', 'corpus passed')
+    benchmark()
@@ -1,6 +1,12 @@
+from threading import Event
+from time import perf_counter
+from time import process_time
+from time import sleep
 from time import time
 
 import lk_logger
+from lk_logger import parallel_printing
+from lk_logger.logger import logger
 
 lk_logger.setup()
 # lk_logger.setup(async_=True)
@@ -30,6 +36,79 @@ def simple_loop() -> None:
             # print(i)
 
 
+def idle_cpu_usage(seconds: float = 1.0) -> None:
+    """
+    how much cpu time the background printer consumes when nothing is -
+    logged. a polling consumer wakes up ~1000 times per second; an event -
+    driven one should stay close to zero.
+    """
+    print(':f', 'measuring idle cpu usage...')
+    start_cpu, start_wall = process_time(), perf_counter()
+    sleep(seconds)
+    cpu, wall = process_time() - start_cpu, perf_counter() - start_wall
+    print(':f', 'idle cpu usage: {:.2f}% ({:.1f} ms cpu in {:.1f} s)'.format(
+        cpu / wall * 100, cpu * 1000, wall
+    ))
+
+
+def enqueue_to_print_latency(count: int = 1000) -> None:
+    """
+    each message carries its own enqueue timestamp, the parallel printer -
+    (which runs right after the console print, in the consumer thread) -
+    reads it back and records the delay.
+    """
+    latencies = []
+    
+    def record(msg: str) -> None:
+        latencies.append(perf_counter() - float(msg))
+    
+    with parallel_printing(record, inherit=False):
+        for _ in range(count):
+            print(perf_counter(), ':s', end='\r')
+            sleep(1e-4)  # not a burst, we want per-message latency.
+        print(':fs')
+    
+    latencies.sort()
+    print('enqueue-to-print latency: p50 = {:.3f} ms, p99 = {:.3f} ms'.format(
+        latencies[len(latencies) // 2] * 1000,
+        latencies[int(len(latencies) * 0.99)] * 1000,
+    ))
+
+
+def burst_throughput(count: int = 10000) -> None:
+    """
+    queue up a burst of messages while the background printer is held, then -
+    measure how fast it drains them, unbatched vs batched. and how fast the -
+    same burst is replayed after being stashed by `lk_logger.delay`.
+    """
+    result = {}
+    for batch_size in (1, 256):
+        lk_logger.update(batch_size=batch_size, batch_timeout=0.005)
+        hold = Event()
+        # noinspection PyProtectedMember
+        logger._enqueue(((), {}, hold.wait))  # blocks the printer.
+        for i in range(count):
+            print(i)
+        start = perf_counter()
+        hold.set()
+        print(':fs')  # wait for draining.
+        result[batch_size] = count / (perf_counter() - start)
+    lk_logger.update(batch_size=1, batch_timeout=0)
+    
+    with lk_logger.delay():
+        for i in range(count):
+            print(i)
+        start = perf_counter()
+    # `delay` exits with a flush, which waits for draining.
+    result['stash'] = count / (perf_counter() - start)
+    print(':f', 'throughput: unbatched = {:,.0f} msg/s, batched = {:,.0f} '
+                'msg/s, stash replay = {:,.0f} msg/s'
+          .format(result[1], result[256], result['stash']))
+
+
 if __name__ == '__main__':
-    # pox tests/speedup.py
+    # pox tests/threaded_speedup.py
     simple_loop()
+    idle_cpu_usage()
+    enqueue_to_print_latency()
+    burst_throughput()
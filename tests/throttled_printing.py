@@ -0,0 +1,42 @@
+"""
+collapse repeated messages and limit the rate of messages from hot loops.
+"""
+from time import perf_counter
+from time import sleep
+
+import lk_logger
+
+lk_logger.setup()
+
+
+def repeated(n: int = 100000) -> None:
+    lk_logger.update(dedup=True)
+    start = perf_counter()
+    for _ in range(n):
+        print('the same message')
+    print('a different message')  # reports the repeats above first.
+    for i in range(3):
+        print('message', i)
+        print('message', i)
+    lk_logger.update(dedup=False)
+    print(':v4', 'dedup: {:.2f}us per call'.format(
+        (perf_counter() - start) / n * 1e6
+    ))
+
+
+def rate_limited(n: int = 100000) -> None:
+    lk_logger.update(rate_limit=5)
+    start = perf_counter()
+    for i in range(n):
+        print('flood', i)
+    duration = perf_counter() - start
+    sleep(1)
+    print('after a while', 'the window is refreshed')
+    lk_logger.update(rate_limit=0)
+    print(':v4', 'rate limit: {:.2f}us per call'.format(duration / n * 1e6))
+
+
+if __name__ == '__main__':
+    # pox tests/throttled_printing.py
+    repeated()
+    rate_limited()